@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+async def _fetch_sprints(sprints, fetchers, finish, concurrency, progress_callback):
+    loop = asyncio.get_running_loop()
+    results = {}
+
+    # Every blocking Jira call runs on this pool, so `concurrency` bounds in-flight requests
+    # across all sprints while the event loop fans the calls out.
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        async def load_one(sprint):
+            started = time.perf_counter()
+            try:
+                fetched = await asyncio.gather(*(loop.run_in_executor(executor, fetch, sprint) for fetch in fetchers))
+                result = await loop.run_in_executor(executor, partial(finish, sprint, *fetched))
+            except Exception as e:
+                print(f"Error loading sprint {sprint.get('id')} ({sprint.get('name', '')}): {e}")
+                traceback.print_exc()
+                result = None
+            return sprint, result, time.perf_counter() - started
+
+        tasks = [asyncio.create_task(load_one(s)) for s in sprints]
+        completed = 0
+        for next_done in asyncio.as_completed(tasks):
+            sprint, result, elapsed = await next_done
+            completed += 1
+            results[sprint['id']] = result
+            if progress_callback:
+                progress_callback(f"Loaded {completed}/{len(sprints)} sprints ({sprint.get('name', sprint['id'])} in {elapsed:.1f}s)")
+    return results
+
+
+def run_coroutine(coro):
+    """
+    Runs a coroutine to completion from synchronous code, even if this thread already has a loop running.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    outcome = {}
+
+    def runner():
+        try:
+            outcome['result'] = asyncio.run(coro)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=runner)
+    thread.start()
+    thread.join()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+def fetch_sprints_concurrently(sprints, fetchers, finish, concurrency=8, progress_callback=None):
+    """
+    Asyncio fan-out for loading many sprints.
+    For each sprint dict, every fetcher(sprint) runs concurrently, then finish(sprint, *fetched) runs
+    on their results. Returns {sprint_id: finish result, or None if that sprint failed}.
+    progress_callback(message) is called from the calling thread as each sprint completes.
+    """
+    if not sprints:
+        return {}
+    return run_coroutine(_fetch_sprints(sprints, fetchers, finish, max(1, concurrency), progress_callback))
@@ -0,0 +1,84 @@
+"""
+Headless backfill of sprint metrics for every closed sprint on one or more boards.
+
+    python backfill.py --board 42 --concurrency 8
+    python backfill.py --board 42:TEAM_UUID --board 57:OTHER_TEAM_UUID
+
+Without --board, the boards saved in the app ("All Boards") are used, or else its single board.
+Connection settings default to the JIRA_DOMAIN / JIRA_EMAIL / JIRA_API_TOKEN environment
+variables, then to what the Streamlit app last saved. Sprints that already have current
+metrics are skipped, so an interrupted run (or a nightly cron job) just picks up the rest.
+"""
+import argparse
+import os
+import sys
+import time
+
+from diagnostics import set_log_file, summarize
+from jira_client import get_client
+from sprint_stats import (
+    MAX_WORKERS, SP_FIELD_ID,
+    init_db, get_config, get_auth_header, parse_boards, backfill_boards,
+)
+
+# Sprints saved per batch; an interrupted run loses at most one batch of work
+BATCH_SIZE = 25
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill metrics for all closed sprints of Jira boards.")
+    parser.add_argument("--domain", help="Jira domain, e.g. yourcompany.atlassian.net")
+    parser.add_argument("--email", help="Jira account email")
+    parser.add_argument("--token", help="Jira API token")
+    parser.add_argument("--board", action="append", default=[], metavar="BOARD[:TEAM]",
+                        help="Board ID, optionally with its team; repeat for several boards")
+    parser.add_argument("--team", help="Team ID (UUID) for boards given without one")
+    parser.add_argument("--limit", type=int, default=1000, help="Only consider each board's latest N sprints (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=MAX_WORKERS, help=f"Concurrent Jira calls (default: {MAX_WORKERS})")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Sprints saved per batch (default: {BATCH_SIZE})")
+    parser.add_argument("--force", action="store_true", help="Recompute sprints that already have metrics")
+    parser.add_argument("--diagnostics-log", metavar="FILE", help="Append per-call and per-phase timings to FILE as JSON lines")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    init_db()
+
+    domain = args.domain or os.environ.get("JIRA_DOMAIN") or get_config("domain")
+    email = args.email or os.environ.get("JIRA_EMAIL") or get_config("email")
+    token = args.token or os.environ.get("JIRA_API_TOKEN") or get_config("token")
+    team_id = args.team or get_config("team_id", "")
+    boards = parse_boards("\n".join(args.board) or get_config("boards", "") or get_config("board_id", ""), team_id)
+    if not (domain and email and token and boards):
+        print("Missing connection details: pass --domain/--email/--token/--board or save them in the app first.")
+        return 2
+
+    if args.diagnostics_log:
+        set_log_file(args.diagnostics_log)
+    auth = get_auth_header(email, token)
+    # Created first so the one connection pool shared by all boards matches the requested concurrency
+    client = get_client(domain, auth, max_workers=max(args.concurrency, MAX_WORKERS))
+    started = time.perf_counter()
+
+    summary = backfill_boards(domain, auth, boards, SP_FIELD_ID, limit=args.limit, concurrency=args.concurrency,
+                              batch_size=args.batch_size, force=args.force, progress_callback=lambda m: print(m, flush=True))
+
+    attempted = sum(todo for _, todo, _ in summary.values())
+    failed = [(scope, sprint) for scope, (_, _, sprints) in summary.items() for sprint in sprints]
+    broken = [scope for scope, (count, _, _) in summary.items() if count is None]
+    http_stats = client.stats()
+    print(f"Backfilled {attempted - len(failed)}/{attempted} sprints across {len(summary)} board/team pairs "
+          f"in {time.perf_counter() - started:.1f}s "
+          f"({http_stats['requests']} HTTP requests, {http_stats['retries']} retried, {http_stats['reuse_pct']:.0f}% connection reuse)")
+    for row in summarize("request"):
+        print(f"  {row['name']}: {row['count']} calls, p50 {row['p50_ms']:.0f} ms, p95 {row['p95_ms']:.0f} ms, {row['retries']} retries")
+    for board_id, team_id in broken:
+        print(f"Failed: board {board_id} / team {team_id}")
+    for (board_id, team_id), sprint in failed:
+        print(f"Failed: board {board_id} / team {team_id}: {sprint['id']} {sprint.get('name', '')}")
+    return 1 if failed or broken else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
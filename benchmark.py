@@ -0,0 +1,225 @@
+"""
+Benchmarks for issue record conversion, the metric engine, timeline reconstruction and trend loading
+on synthetic Jira data.
+
+    python benchmark.py                     # 100, 1,000 and 10,000 issues, compared with the saved baseline
+    python benchmark.py --sizes 1000 --repeat 10
+    python benchmark.py --save-baseline     # record this run as the new baseline
+
+Timings are the best of --repeat runs; memory is the tracemalloc peak of one extra run.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from jira_dates import parse_jira_datetime, jira_epoch_ms
+from jira_fixtures import make_board, make_bugs, DONE_STATUS_IDS, SP_FIELD_ID
+from issue_records import IssueRecord
+from metrics_engine import IssueTimeline, flatten_sprint, compute_stats
+from migrations import migrate
+from issue_store import merge_sprint_issues, load_sprint_issues
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+SIZES = [100, 1000, 10000]
+# Trend loading covers the selected sprint plus four older ones, sharing the issue count between them
+TREND_SPRINTS = 5
+
+
+def clear_date_caches():
+    parse_jira_datetime.cache_clear()
+    jira_epoch_ms.cache_clear()
+
+
+def bench_parse_dates(sprint, issues, bugs):
+    values = []
+    for issue in issues:
+        fields = issue['fields']
+        values.append(fields['created'])
+        values.append(fields['resolutiondate'])
+        values.extend(h['created'] for h in issue['changelog']['histories'])
+
+    def run():
+        clear_date_caches()
+        for value in values:
+            parse_jira_datetime(value)
+    return run
+
+
+def to_records(issues):
+    return [IssueRecord.from_issue(i, SP_FIELD_ID) for i in issues]
+
+
+def bench_records(sprint, issues, bugs):
+    def run():
+        to_records(issues)
+    return run
+
+
+def bench_timeline(sprint, issues, bugs):
+    start = parse_jira_datetime(sprint['startDate'])
+    end = parse_jira_datetime(sprint.get('completeDate'))
+    records = to_records(issues)
+
+    def run():
+        clear_date_caches()
+        for issue in records:
+            timeline = IssueTimeline(issue)
+            timeline.status_at(start)
+            timeline.status_at(end)
+            timeline.first_added(sprint['id'], sprint['name'])
+    return run
+
+
+def bench_metrics(sprint, issues, bugs):
+    records = to_records(issues)
+
+    def run():
+        clear_date_caches()
+        compute_stats(flatten_sprint(sprint, records), len(bugs), 80, DONE_STATUS_IDS)
+    return run
+
+
+def bench_metrics_breakdown(sprint, issues, bugs):
+    records = to_records(issues)
+
+    def run():
+        clear_date_caches()
+        compute_stats(flatten_sprint(sprint, records), len(bugs), 80, DONE_STATUS_IDS, breakdown=[])
+    return run
+
+
+def bench_trend_load(sprints, board_issues, bugs):
+    """
+    The local half of trend loading: store each sprint's fetched issues, read them back, compute metrics.
+    """
+    workdir = tempfile.mkdtemp(prefix="sprint-bench-")
+    runs = [0]
+    board_records = {sprint_id: to_records(issues) for sprint_id, issues in board_issues.items()}
+
+    def run():
+        runs[0] += 1
+        db_file = os.path.join(workdir, f"trend-{runs[0]}.db")
+        migrate(db_file)
+        clear_date_caches()
+        synced_at = parse_jira_datetime(sprints[-1]['endDate'])
+        for sprint in sprints:
+            merge_sprint_issues(db_file, sprint['id'], sprint, board_records[sprint['id']], synced_at,
+                                member_keys=[i.key for i in board_records[sprint['id']]])
+        for sprint in sprints:
+            sprint_info, issues = load_sprint_issues(db_file, sprint['id'])
+            compute_stats(flatten_sprint(sprint_info, issues), len(bugs), 80, DONE_STATUS_IDS)
+    run.cleanup = lambda: shutil.rmtree(workdir, ignore_errors=True)
+    return run
+
+
+SPRINT_BENCHMARKS = [
+    ("parse_dates", bench_parse_dates),
+    ("records", bench_records),
+    ("timeline", bench_timeline),
+    ("metrics", bench_metrics),
+    ("metrics_breakdown", bench_metrics_breakdown),
+]
+
+
+def measure(run, repeat):
+    """
+    Returns (best wall time in seconds, peak traced bytes).
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak
+
+
+def run_benchmarks(sizes, repeat, seed=0):
+    """
+    Yields (name, size, {"seconds": ..., "peak_bytes": ...}) as each benchmark completes.
+    """
+    for size in sizes:
+        # The selected sprint is the newest closed one; trend sprints share `size` issues between them
+        sprints, board_issues = make_board(2, size, seed=seed)
+        sprint, issues = sprints[0], board_issues[sprints[0]['id']]
+        bugs = make_bugs(10)
+        benchmarks = [(name, factory(sprint, issues, bugs)) for name, factory in SPRINT_BENCHMARKS]
+
+        trend_sprints, trend_issues = make_board(TREND_SPRINTS, max(1, size // TREND_SPRINTS), seed=seed)
+        benchmarks.append(("trend_load", bench_trend_load(trend_sprints, trend_issues, bugs)))
+
+        for name, run in benchmarks:
+            seconds, peak = measure(run, repeat)
+            if hasattr(run, 'cleanup'):
+                run.cleanup()
+            yield name, size, {"seconds": seconds, "peak_bytes": peak}
+
+
+def environment():
+    return {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()}
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark metric calculation on synthetic Jira data.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="Comma separated issue counts (default: 100,1000,10000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark; the best is kept (default: 5)")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic data seed")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline file to compare with / save to")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Exit with status 1 if any benchmark is this many percent slower than the baseline")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    baseline = load_baseline(args.baseline)
+    base_results = baseline["results"] if baseline else {}
+    if baseline and baseline.get("environment") != environment():
+        print(f"Note: baseline was recorded on {baseline.get('environment')}, this is {environment()}")
+
+    print(f"{'benchmark':<20}{'issues':>8}{'best ms':>12}{'peak MB':>10}{'baseline ms':>14}{'change':>9}")
+    results = {}
+    regressions = []
+    for name, size, result in run_benchmarks(sizes, max(1, args.repeat), seed=args.seed):
+        key = f"{name}@{size}"
+        results[key] = result
+        line = f"{name:<20}{size:>8}{result['seconds'] * 1000:>12.1f}{result['peak_bytes'] / 2**20:>10.1f}"
+        base = base_results.get(key)
+        if base:
+            change = (result['seconds'] / base['seconds'] - 1) * 100
+            line += f"{base['seconds'] * 1000:>14.1f}{change:>+8.0f}%"
+            if args.max_regression is not None and change > args.max_regression:
+                regressions.append((key, change))
+        print(line, flush=True)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+
+    for key, change in regressions:
+        print(f"Regression: {key} is {change:.0f}% slower than the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from metrics_repo import ROLLING_SPRINTS, ROLLUP_COLUMNS
+
+# Built figures kept across reruns; a rerun whose chart inputs did not change reuses them
+FIGURE_CACHE_SIZE = 64
+
+# Columns the trend charts are drawn from (sprint_metrics and its rollup)
+TREND_COLUMNS = ['sprint_id', 'sprint_name', 'velocity', 'carryover_pct', 'completion_pct_total', 'planned_pct',
+                 'completed_unplanned', 'unplanned_sp', 'bugs_in', 'bugs_out'] + ROLLUP_COLUMNS
+# Longer trends drop the value labels on their points
+TREND_LABELLED_SPRINTS = 10
+
+_BAR_LAYOUT = dict(barmode='group', height=300, margin=dict(l=20, r=20, t=30, b=20), showlegend=True,
+                   legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='center', x=0.5))
+_TREND_LAYOUT = dict(height=350, margin=dict(l=20, r=20, t=50, b=40),
+                     legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='center', x=0.5),
+                     yaxis=dict(range=[0, 110]))
+
+# Lives at module level so it survives Streamlit reruns (app.py is re-executed, imports are not)
+_figures = OrderedDict()
+_lock = threading.Lock()
+
+
+def rows_key(df, columns):
+    """
+    Content hash of the given columns of df (missing columns count as empty), for keying cached figures.
+    """
+    hashed = pd.util.hash_pandas_object(df.reindex(columns=columns), index=False)
+    return hashlib.sha1(hashed.values.tobytes()).hexdigest()
+
+
+def cached_figures(name, key, build):
+    """
+    Returns build()'s result for (name, key), building it only when that pair is not cached.
+    """
+    with _lock:
+        cached = _figures.get((name, key))
+        if cached is not None:
+            _figures.move_to_end((name, key))
+            return cached
+    built = build()
+    with _lock:
+        _figures[(name, key)] = built
+        while len(_figures) > FIGURE_CACHE_SIZE:
+            _figures.popitem(last=False)
+    return built
+
+
+def sprint_labels(df):
+    """
+    Short x-axis labels: "Artisans Iteration 19 2025" -> "IR19", other names cut to 15 characters,
+    unnamed sprints "Sprint <id>".
+    """
+    names = df['sprint_name'] if 'sprint_name' in df else pd.Series(None, index=df.index, dtype=object)
+    names = names.where(names.map(lambda n: isinstance(n, str) and n != ''))
+    iteration = names.str.extract(r'(?:^|\s)Iteration\s+(\S+)', expand=False)
+    labels = ('IR' + iteration).fillna(names.str[:15])
+    return labels.fillna('Sprint ' + df['sprint_id'].astype(int).astype(str)).tolist()
+
+
+def _bar_pair(names, values, text):
+    return go.Figure(data=[
+        go.Bar(name=name, x=[name], y=[value], marker_color=color, text=[label], textposition='inside',
+               textfont=dict(color='white', size=16))
+        for name, value, label, color in zip(names, values, text, ('#4285F4', '#EA4335'))
+    ])
+
+
+def _build_sprint_figures(planned_sp, unplanned_sp, completed_planned, completed_unplanned, bugs_in, bugs_out):
+    planned = _bar_pair(['Planned SP', 'Completed Planned SP'], [planned_sp, completed_planned],
+                        [f"{planned_sp:.1f}", f"{completed_planned:.1f}"])
+    planned.update_layout(**_BAR_LAYOUT)
+    planned.update_yaxes(range=[0, max(planned_sp, completed_planned) * 1.2])
+
+    unplanned = _bar_pair(['Unplanned SP', 'Completed Unplanned SP'], [unplanned_sp, completed_unplanned],
+                          [f"{unplanned_sp:.1f}", f"{completed_unplanned:.1f}"])
+    unplanned.update_layout(**_BAR_LAYOUT)
+    unplanned.update_yaxes(range=[0, max(unplanned_sp, completed_unplanned, 1) * 1.2])
+
+    breakdown = None
+    if completed_planned + completed_unplanned > 0:
+        breakdown = go.Figure(data=[go.Pie(
+            labels=['Planned', 'Unplanned'],
+            values=[completed_planned, completed_unplanned],
+            marker=dict(colors=['#4285F4', '#EA4335']),
+            textinfo='label+percent',
+            textposition='outside',
+            textfont=dict(size=14),
+            hole=0
+        )])
+        breakdown.update_layout(height=300, margin=dict(l=20, r=20, t=30, b=20), showlegend=False)
+
+    bugs = _bar_pair(['Bugs In', 'Bugs Out'], [bugs_in, bugs_out], [int(bugs_in), int(bugs_out)])
+    bugs.update_layout(**_BAR_LAYOUT)
+
+    return {"planned": planned, "unplanned": unplanned, "breakdown": breakdown, "bugs": bugs}
+
+
+def sprint_figures(met, planned_cap):
+    """
+    Figures of one sprint_metrics row: {"planned", "unplanned", "breakdown" (None when nothing was completed), "bugs"}.
+    Rows from before planned_sp was stored fall back to the planned capacity.
+    """
+    planned_sp = met['planned_sp'] if 'planned_sp' in met and met['planned_sp'] > 0 else planned_cap
+    unplanned_sp = met['unplanned_sp'] if 'unplanned_sp' in met else 0
+    values = tuple(float(v) for v in (planned_sp, unplanned_sp, met['completed_planned'], met['completed_unplanned'],
+                                      met['bugs_in'], met['bugs_out']))
+    return cached_figures("sprint", values, lambda: _build_sprint_figures(*values))
+
+
+def _trend_line(fig, x, y, name, color, position, size, labelled=True):
+    fig.add_trace(go.Scatter(
+        x=x, y=y,
+        mode='lines+markers+text' if labelled else 'lines+markers', name=name,
+        line=dict(color=color, width=2),
+        text=[f"{v:.0f}%" for v in y], textposition=position, textfont=dict(color=color, size=size)
+    ))
+
+
+def _rolling_line(fig, x, df, prefix, name, color, error=False):
+    # Rolling average from sprint_metrics_rollup, with its standard deviation as error bars if asked
+    fig.add_trace(go.Scatter(
+        x=x, y=df[f'{prefix}_avg'].tolist(),
+        mode='lines', name=name,
+        line=dict(color=color, width=2, dash='dash'),
+        error_y=dict(type='data', array=df[f'{prefix}_std'].tolist(), visible=True, color=color, thickness=1) if error else None
+    ))
+
+
+def _build_trend_figures(df):
+    labels = sprint_labels(df)
+    labelled = len(df) <= TREND_LABELLED_SPRINTS
+    rolling = 'velocity_avg' in df and df['velocity_avg'].notna().all()
+    rolling_name = f"{ROLLING_SPRINTS}-sprint avg"
+
+    completion = go.Figure()
+    _trend_line(completion, labels, (100 - df['carryover_pct']).tolist(), 'Task Completion %', '#4285F4', 'top center', 11, labelled)
+    _trend_line(completion, labels, df['completion_pct_total'].tolist(), 'SP Completion %', '#F4A235', 'bottom center', 11, labelled)
+    if rolling:
+        _rolling_line(completion, labels, df, 'completion', f"SP Completion % ({rolling_name})", '#9E9E9E')
+    completion.update_layout(**_TREND_LAYOUT)
+
+    planned_pct = df['planned_pct'].tolist()
+    unplanned_sp = df['unplanned_sp'].fillna(0) if 'unplanned_sp' in df else pd.Series(0.0, index=df.index)
+    unplanned_comp = np.where(unplanned_sp > 0, df['completed_unplanned'] / unplanned_sp.where(unplanned_sp > 0) * 100, 0)
+
+    planned = go.Figure()
+    _trend_line(planned, labels, planned_pct, '% Planned', '#4285F4', 'top center', 10, labelled)
+    _trend_line(planned, labels, planned_pct, '% Completion (planned)', '#EA4335', 'bottom center', 10, labelled)
+    _trend_line(planned, labels, df['completion_pct_total'].tolist(), '% Completion (total)', '#FBBC04', 'bottom center', 10, labelled)
+    if (unplanned_comp > 0).any():
+        _trend_line(planned, labels, unplanned_comp.tolist(), '% Completion (unplanned)', '#9E9E9E', 'top center', 10, labelled)
+    planned.update_layout(**_TREND_LAYOUT)
+
+    figures = {"completion": completion, "planned": planned, "velocity": None, "bugs": None}
+    if not rolling:
+        return figures
+
+    # Velocity with the rolling min-max range shaded behind it
+    velocity = go.Figure()
+    velocity.add_trace(go.Scatter(x=labels, y=df['velocity_max'].tolist(), mode='lines', line=dict(width=0),
+                                  showlegend=False, hoverinfo='skip'))
+    velocity.add_trace(go.Scatter(x=labels, y=df['velocity_min'].tolist(), mode='lines', line=dict(width=0),
+                                  fill='tonexty', fillcolor='rgba(66, 133, 244, 0.15)', name=f"{ROLLING_SPRINTS}-sprint min-max"))
+    velocity.add_trace(go.Scatter(
+        x=labels, y=df['velocity'].tolist(),
+        mode='lines+markers+text' if labelled else 'lines+markers', name='Velocity',
+        line=dict(color='#4285F4', width=2),
+        text=[f"{v:.1f}" for v in df['velocity']], textposition='top center', textfont=dict(color='#4285F4', size=10)
+    ))
+    _rolling_line(velocity, labels, df, 'velocity', f"Velocity ({rolling_name} ± std)", '#EA4335', error=True)
+    velocity.update_layout(**{**_TREND_LAYOUT, 'yaxis': dict(rangemode='tozero')})
+
+    bugs = go.Figure(data=[
+        go.Bar(name='Bugs In', x=labels, y=df['bugs_in'].tolist(), marker_color='#4285F4'),
+        go.Bar(name='Bugs Out', x=labels, y=df['bugs_out'].tolist(), marker_color='#EA4335'),
+    ])
+    _rolling_line(bugs, labels, df, 'bugs_in', f"Bugs In ({rolling_name})", '#1A53B0')
+    _rolling_line(bugs, labels, df, 'bugs_out', f"Bugs Out ({rolling_name})", '#A52714')
+    bugs.update_layout(**{**_TREND_LAYOUT, 'barmode': 'group', 'yaxis': dict(rangemode='tozero')})
+
+    figures.update(velocity=velocity, bugs=bugs)
+    return figures
+
+
+def trend_figures(df_sorted):
+    """
+    Trend figures over sprint_metrics rows in display order (as returned by get_trend_metrics):
+    {"completion", "planned", "velocity", "bugs"}; the last two are None when the rows carry no rolling stats.
+    """
+    return cached_figures("trend", rows_key(df_sorted, TREND_COLUMNS), lambda: _build_trend_figures(df_sorted))
@@ -0,0 +1,71 @@
+import math
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class Database:
+    """
+    One long-lived SQLite connection shared by every thread in the process.
+    Access is serialized by a lock, so parallel workers queue instead of hitting "database is locked";
+    WAL lets other processes (e.g. a backfill run) keep reading while we write.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        # sqlite3 keeps compiled statements per connection; a long-lived connection makes that cache pay off
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30, cached_statements=256)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA busy_timeout=30000')
+        # The metrics rollups need sqrt(), which SQLite only has when built with its math functions
+        try:
+            self.conn.execute('SELECT sqrt(1)')
+        except sqlite3.OperationalError:
+            self.conn.create_function('sqrt', 1, math.sqrt, deterministic=True)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Cursor inside a single transaction: commits on success, rolls back on error.
+        """
+        with self.lock:
+            with self.conn:
+                yield self.conn.cursor()
+
+    def execute(self, sql, params=()):
+        with self.transaction() as c:
+            c.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        with self.transaction() as c:
+            c.executemany(sql, rows)
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_db(path):
+    """
+    Returns the process-wide Database for this file, opening it on first use.
+    """
+    with _databases_lock:
+        db = _databases.get(path)
+        if db is None:
+            db = Database(path)
+            _databases[path] = db
+        return db
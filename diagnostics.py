@@ -0,0 +1,120 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Most recent timing events kept in memory for the Diagnostics panel.
+RING_SIZE = 5000
+# JSON lines log of every event, for offline analysis; also settable with set_log_file().
+LOG_ENV_VAR = "SPRINT_STATS_DIAGNOSTICS_LOG"
+
+# Numeric path segments (board, sprint, issue ids, but not the /rest/api/3 version) are folded
+# so calls group by endpoint.
+_ID_SEGMENT = re.compile(r"(?<!/api)/\d+(?=/|$)")
+
+_events = deque(maxlen=RING_SIZE)
+_lock = threading.Lock()
+_log_path = os.environ.get(LOG_ENV_VAR) or None
+
+
+def set_log_file(path):
+    """
+    Appends every later event to path as JSON lines; a falsy path turns the log off.
+    """
+    global _log_path
+    with _lock:
+        _log_path = path or None
+
+
+def endpoint_name(method, path):
+    """
+    GET /rest/agile/1.0/sprint/123/issue -> GET /rest/agile/1.0/sprint/{id}/issue
+    """
+    path = path.split("?", 1)[0]
+    if "://" in path:
+        path = "/" + path.split("://", 1)[1].partition("/")[2]
+    return f"{method} {_ID_SEGMENT.sub('/{id}', path)}"
+
+
+def record(kind, name, seconds, **fields):
+    """
+    Adds one timing event ("request" or "phase") to the ring buffer and the log, if any.
+    """
+    event = {"ts": time.time(), "kind": kind, "name": name, "ms": round(seconds * 1000, 3), **fields}
+    with _lock:
+        _events.append(event)
+        if _log_path:
+            try:
+                with open(_log_path, "a") as f:
+                    f.write(json.dumps(event) + "\n")
+            except OSError as e:
+                print(f"Error writing diagnostics log {_log_path}: {e}")
+
+
+def record_request(method, path, status, nbytes, seconds, retries=0):
+    record("request", endpoint_name(method, path), seconds, status=status, bytes=nbytes, retries=retries)
+
+
+@contextmanager
+def timed(phase, **fields):
+    """
+    Times the with-block as a phase event, e.g. with timed("sync.store", sprint_id=42): ...
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record("phase", phase, time.perf_counter() - started, **fields)
+
+
+def events(kind=None):
+    with _lock:
+        snapshot = list(_events)
+    return [e for e in snapshot if kind is None or e["kind"] == kind]
+
+
+def clear():
+    with _lock:
+        _events.clear()
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(kind):
+    """
+    Per endpoint (kind="request") or phase (kind="phase"): count, p50/p95/max and total milliseconds,
+    plus bytes, retries and non-2xx responses for requests. Slowest total first.
+    """
+    grouped = {}
+    for e in events(kind):
+        grouped.setdefault(e["name"], []).append(e)
+
+    rows = []
+    for name, group in grouped.items():
+        times = sorted(e["ms"] for e in group)
+        row = {
+            "name": name,
+            "count": len(group),
+            "p50_ms": percentile(times, 50),
+            "p95_ms": percentile(times, 95),
+            "max_ms": times[-1],
+            "total_ms": round(sum(times), 3),
+        }
+        if kind == "request":
+            row["bytes"] = sum(e.get("bytes") or 0 for e in group)
+            row["retries"] = sum(e.get("retries") or 0 for e in group)
+            row["errors"] = sum(1 for e in group if not 200 <= (e.get("status") or 0) < 300)
+        rows.append(row)
+    rows.sort(key=lambda r: r["total_ms"], reverse=True)
+    return rows
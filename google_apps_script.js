@@ -1,4 +1,10 @@
+// Idempotency keys of already applied exports are kept in script properties (most recent first)
+var SEEN_KEYS_PROPERTY = "exportedKeys";
+var MAX_SEEN_KEYS = 500;
+var HIGHLIGHT = "#fff2cc";
+
 function doGet(e) {
+    // Legacy single-sprint export link: ?data=<payload JSON>
     var lock = LockService.getScriptLock();
     lock.tryLock(10000);
 
@@ -9,7 +15,7 @@ function doGet(e) {
         }
 
         var data = JSON.parse(jsonString);
-        return processData(data);
+        return processBatch([data]);
 
     } catch (error) {
         return createResponse("error", error.toString());
@@ -19,114 +25,168 @@ function doGet(e) {
 }
 
 function doPost(e) {
-    return createResponse("error", "Please use the browser-based Export link (GET request).");
-}
+    // Batch export from the app's export queue: {"batch": [payload, ...]}, each with an idempotencyKey
+    var lock = LockService.getScriptLock();
+    lock.tryLock(30000);
 
-function processData(data) {
-    var sprintKey = getSprintKey(data.sprintName);
-    if (!sprintKey) {
-        return createResponse("error", "Could not parse sprint key (e.g. IR21) from name: " + data.sprintName);
-    }
+    try {
+        var body = JSON.parse(e.postData.contents);
+        if (!body || !Array.isArray(body.batch)) {
+            return createResponse("error", "Expected {\"batch\": [...]}.");
+        }
+        return processBatch(body.batch);
 
-    var sheet = SpreadsheetApp.getActiveSpreadsheet().getSheetByName("Team Stats");
-    if (!sheet) {
-        return createResponse("error", "Sheet 'Team Stats' not found.");
+    } catch (error) {
+        return createResponse("error", error.toString());
+    } finally {
+        lock.releaseLock();
     }
+}
 
-    // 1. VELOCITY STATS (Lookup A4:A26)
-    // Key in Col A. Update B (Unplanned), C (Planned), D (Velocity)
-    updateVerticalRange(sheet, "A4:A26", sprintKey, 4, function (row) {
-        // B, C, D are columns 2, 3, 4
-        sheet.getRange(row, 2).setValue(data.completedUnplanned);
-        sheet.getRange(row, 3).setValue(data.completedPlanned);
-        sheet.getRange(row, 4).setValue(data.velocity);
-        sheet.getRange(row, 2, 1, 3).setBackground("#fff2cc");
-    });
-
-    // 2. TASK COMPLETION STATS (Lookup A34:A56)
-    // Key in Col A. Update B (Tasks Done), C (Tasks Incomplete), D (Carryover %)
-    updateVerticalRange(sheet, "A34:A56", sprintKey, 34, function (row) {
-        sheet.getRange(row, 2).setValue(data.completedTasks);
-        sheet.getRange(row, 3).setValue(data.incompleteTasks);
-        sheet.getRange(row, 4).setValue(data.carryover / 100); // Input is usually %, Sheets needs 0.xx
-        sheet.getRange(row, 2, 1, 3).setBackground("#fff2cc");
-    });
-
-    // 3. COMPLETION PERCENTAGES (Lookup G3:AC3)
-    // Key in Row 3. Update Row 6, 7, 8, 9 in found Column.
-    updateHorizontalRange(sheet, "G3:AC3", sprintKey, 7, function (col) { // 7 = G
-        sheet.getRange(6, col).setValue(data.plannedPct / 100);
-        sheet.getRange(7, col).setValue(data.plannedCompletionPct / 100);
-        sheet.getRange(8, col).setValue(data.unplannedCompletionPct / 100);
-        sheet.getRange(9, col).setValue(data.totalCompletionPct / 100);
-        sheet.getRange(6, col, 4, 1).setBackground("#fff2cc");
-    });
-
-    // 4. TASK VS SP COMPLETION (Lookup G24:AC24)
-    // Key in Row 24. Update Row 25 (Task %), 26 (Total %)
-    updateHorizontalRange(sheet, "G24:AC24", sprintKey, 7, function (col) {
-        sheet.getRange(25, col).setValue(data.taskCompletionPct / 100);
-        sheet.getRange(26, col).setValue(data.totalCompletionPct / 100); // Duplicate of above? Following spec.
-        sheet.getRange(25, col, 2, 1).setBackground("#fff2cc");
-    });
-
-    // 5. BUGS IN VS BUGS OUT (Lookup G39:AC39)
-    // Key in Row 39. Update Row 40 (In), 41 (Out)
-    updateHorizontalRange(sheet, "G39:AC39", sprintKey, 7, function (col) {
-        sheet.getRange(40, col).setValue(data.bugsIn);
-        sheet.getRange(41, col).setValue(data.bugsOut);
-        sheet.getRange(40, col, 2, 1).setBackground("#fff2cc");
+// Reads a range once (values, formulas, backgrounds) so many sprints can be written with one setValues.
+// Untouched cells are written back with their formula when they have one, else their value.
+function loadBlock(sheet, address) {
+    var range = sheet.getRange(address);
+    var values = range.getValues();
+    var formulas = range.getFormulas();
+    var cells = values.map(function (row, r) {
+        return row.map(function (value, c) { return formulas[r][c] || value; });
     });
+    return { range: range, keys: values, cells: cells, backgrounds: range.getBackgrounds(), dirty: false };
+}
 
-    // 6. LATEST DATA (Static Mapping)
-    // B62: Planned SP, C62: Completed Planned SP
-    sheet.getRange("B62").setValue(data.plannedSP);
-    sheet.getRange("C62").setValue(data.completedPlanned);
-
-    // E62: Unplanned SP, F62: Completed Unplanned SP
-    sheet.getRange("E62").setValue(data.unplannedSP);
-    sheet.getRange("F62").setValue(data.completedUnplanned);
+function setCell(block, r, c, value, highlight) {
+    block.cells[r][c] = value;
+    if (highlight) {
+        block.backgrounds[r][c] = HIGHLIGHT;
+    }
+    block.dirty = true;
+}
 
-    // L62: Bugs In, M62: Bugs Out
-    sheet.getRange("L62").setValue(data.bugsIn);
-    sheet.getRange("M62").setValue(data.bugsOut);
+function saveBlock(block) {
+    if (block.dirty) {
+        block.range.setValues(block.cells);
+        block.range.setBackgrounds(block.backgrounds);
+    }
+}
 
-    // No highlighting for static data as requested.
+// Index of the row whose first cell is key (vertical tables), or -1
+function findRow(block, key) {
+    for (var i = 0; i < block.keys.length; i++) {
+        if (block.keys[i][0] == key) return i;
+    }
+    return -1;
+}
 
-    SpreadsheetApp.flush();
-    return createResponse("success", "Updated stats for " + sprintKey);
+// Index of the column whose header (first row) is key (horizontal tables), or -1
+function findCol(block, key) {
+    var header = block.keys[0];
+    for (var i = 0; i < header.length; i++) {
+        if (header[i] == key) return i;
+    }
+    return -1;
 }
 
-// Helper: Vertical Lookup
-// rangeAddress: e.g. "A4:A26"
-// startRow: e.g. 4 (the row index of the first cell in range)
-function updateVerticalRange(sheet, rangeAddress, key, startRow, callback) {
-    var range = sheet.getRange(rangeAddress);
-    var values = range.getValues(); // Array of [ [val], [val] ]
-
-    for (var i = 0; i < values.length; i++) {
-        if (values[i][0] == key) {
-            var actualRow = startRow + i;
-            callback(actualRow);
+function processBatch(items) {
+    var sheet = SpreadsheetApp.getActiveSpreadsheet().getSheetByName("Team Stats");
+    if (!sheet) {
+        return createResponse("error", "Sheet 'Team Stats' not found.");
+    }
+
+    var properties = PropertiesService.getScriptProperties();
+    var seen = JSON.parse(properties.getProperty(SEEN_KEYS_PROPERTY) || "[]");
+
+    // 1. Velocity (keys A4:A26; B Unplanned, C Planned, D Velocity)
+    var velocity = loadBlock(sheet, "A4:D26");
+    // 2. Task completion (keys A34:A56; B Tasks Done, C Tasks Incomplete, D Carryover %)
+    var tasks = loadBlock(sheet, "A34:D56");
+    // 3. Completion percentages (keys G3:AC3; rows 6-9)
+    var completion = loadBlock(sheet, "G3:AC9");
+    // 4. Task vs SP completion (keys G24:AC24; rows 25-26)
+    var taskVsSp = loadBlock(sheet, "G24:AC26");
+    // 5. Bugs in vs bugs out (keys G39:AC39; rows 40-41)
+    var bugs = loadBlock(sheet, "G39:AC41");
+    // 6. Latest data (static B62:M62), no highlighting
+    var latest = loadBlock(sheet, "B62:M62");
+
+    var results = [];
+    var latestData = null;
+    items.forEach(function (data) {
+        var key = data.idempotencyKey;
+        if (key && seen.indexOf(key) !== -1) {
+            results.push({ idempotencyKey: key, status: "duplicate" });
+            return;
+        }
+        var sprintKey = getSprintKey(data.sprintName);
+        if (!sprintKey) {
+            results.push({ idempotencyKey: key, status: "error",
+                           message: "Could not parse sprint key (e.g. IR21) from name: " + data.sprintName });
             return;
         }
-    }
-}
 
-// Helper: Horizontal Lookup
-// rangeAddress: e.g. "G3:AC3"
-// startCol: e.g. 7 (G is 7th column)
-function updateHorizontalRange(sheet, rangeAddress, key, startCol, callback) {
-    var range = sheet.getRange(rangeAddress);
-    var values = range.getValues()[0]; // Single row array
-
-    for (var i = 0; i < values.length; i++) {
-        if (values[i] == key) {
-            var actualCol = startCol + i;
-            callback(actualCol);
+        var found = false;
+        var row = findRow(velocity, sprintKey);
+        if (row !== -1) {
+            setCell(velocity, row, 1, data.completedUnplanned, true);
+            setCell(velocity, row, 2, data.completedPlanned, true);
+            setCell(velocity, row, 3, data.velocity, true);
+            found = true;
+        }
+        row = findRow(tasks, sprintKey);
+        if (row !== -1) {
+            setCell(tasks, row, 1, data.completedTasks, true);
+            setCell(tasks, row, 2, data.incompleteTasks, true);
+            setCell(tasks, row, 3, data.carryover / 100, true); // Input is %, Sheets needs 0.xx
+            found = true;
+        }
+        var col = findCol(completion, sprintKey);
+        if (col !== -1) {
+            setCell(completion, 3, col, data.plannedPct / 100, true);
+            setCell(completion, 4, col, data.plannedCompletionPct / 100, true);
+            setCell(completion, 5, col, data.unplannedCompletionPct / 100, true);
+            setCell(completion, 6, col, data.totalCompletionPct / 100, true);
+            found = true;
+        }
+        col = findCol(taskVsSp, sprintKey);
+        if (col !== -1) {
+            setCell(taskVsSp, 1, col, data.taskCompletionPct / 100, true);
+            setCell(taskVsSp, 2, col, data.totalCompletionPct / 100, true);
+            found = true;
+        }
+        col = findCol(bugs, sprintKey);
+        if (col !== -1) {
+            setCell(bugs, 1, col, data.bugsIn, true);
+            setCell(bugs, 2, col, data.bugsOut, true);
+            found = true;
+        }
+
+        if (!found) {
+            results.push({ idempotencyKey: key, status: "error", message: sprintKey + " is not in the sheet." });
             return;
         }
+        latestData = data;
+        if (key) {
+            seen.unshift(key);
+        }
+        results.push({ idempotencyKey: key, status: "updated", sprintKey: sprintKey });
+    });
+
+    if (latestData) {
+        // B62/C62 Planned SP / Completed Planned SP, E62/F62 Unplanned SP / Completed Unplanned SP, L62/M62 Bugs In / Out
+        setCell(latest, 0, 0, latestData.plannedSP, false);
+        setCell(latest, 0, 1, latestData.completedPlanned, false);
+        setCell(latest, 0, 3, latestData.unplannedSP, false);
+        setCell(latest, 0, 4, latestData.completedUnplanned, false);
+        setCell(latest, 0, 10, latestData.bugsIn, false);
+        setCell(latest, 0, 11, latestData.bugsOut, false);
     }
+
+    [velocity, tasks, completion, taskVsSp, bugs, latest].forEach(saveBlock);
+    properties.setProperty(SEEN_KEYS_PROPERTY, JSON.stringify(seen.slice(0, MAX_SEEN_KEYS)));
+    SpreadsheetApp.flush();
+
+    var updated = results.filter(function (r) { return r.status === "updated"; }).length;
+    return createResponse("success", "Updated stats for " + updated + " of " + items.length + " sprints", results);
 }
 
 function getSprintKey(sprintName) {
@@ -147,7 +207,10 @@ function getSprintKey(sprintName) {
     }
 }
 
-function createResponse(status, message) {
+function createResponse(status, message, results) {
     var output = { status: status, updated: message };
+    if (results) {
+        output.results = results;
+    }
     return ContentService.createTextOutput(JSON.stringify(output)).setMimeType(ContentService.MimeType.JSON);
 }
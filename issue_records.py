@@ -0,0 +1,89 @@
+def _story_points(value):
+    if value is None:
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class IssueRecord:
+    """
+    The parts of a Jira issue the metrics use, without the raw JSON.
+    status_events holds (created, from status id, to status id) and sprint_events (created, to sprints)
+    in changelog order; every other changelog field is dropped on conversion.
+    """
+    __slots__ = (
+        'key', 'id', 'issue_type', 'is_subtask', 'points', 'created', 'resolution_date', 'updated',
+        'status_id', 'status_name', 'status_category', 'status_events', 'sprint_events', 'changelog_truncated',
+    )
+
+    @classmethod
+    def from_issue(cls, issue, sp_field_id):
+        """
+        Converts one issue of an agile/search response (expand=changelog) into a record.
+        changelog_truncated is set when Jira inlined fewer histories than the issue has.
+        """
+        fields = issue.get('fields', {})
+        status = fields.get('status') or {}
+        issue_type = fields.get('issuetype') or {}
+        changelog = issue.get('changelog') or {}
+        histories = changelog.get('histories', [])
+
+        record = cls()
+        record.key = issue['key']
+        record.id = str(issue.get('id', ''))
+        record.issue_type = issue_type.get('name', '')
+        record.is_subtask = bool(issue_type.get('subtask', False))
+        record.points = _story_points(fields.get(sp_field_id))
+        record.created = fields.get('created')
+        record.resolution_date = fields.get('resolutiondate')
+        record.updated = fields.get('updated')
+        record.status_id = status.get('id')
+        record.status_name = status.get('name', '')
+        record.status_category = (status.get('statusCategory') or {}).get('key')
+        record.set_histories(histories)
+        record.changelog_truncated = changelog.get('total', 0) > len(histories)
+        return record
+
+    def set_histories(self, histories):
+        """
+        Replaces the status and Sprint events with those of a list of changelog histories.
+        """
+        status_events = []
+        sprint_events = []
+        for h in histories:
+            created = h.get('created')
+            for item in h.get('items', []):
+                field = item.get('field')
+                if field == 'status':
+                    status_events.append((created, item.get('from'), item.get('to')))
+                elif field == 'Sprint':
+                    sprint_events.append((created, str(item.get('to') or '')))
+        self.status_events = tuple(status_events)
+        self.sprint_events = tuple(sprint_events)
+        self.changelog_truncated = False
+
+    def to_row(self):
+        """
+        JSON-ready list for the issue store; from_row() reverses it.
+        """
+        return [
+            self.key, self.id, self.issue_type, self.is_subtask, self.points, self.created, self.resolution_date,
+            self.updated, self.status_id, self.status_name, self.status_category,
+            [list(e) for e in self.status_events], [list(e) for e in self.sprint_events],
+        ]
+
+    @classmethod
+    def from_row(cls, row):
+        record = cls()
+        (record.key, record.id, record.issue_type, record.is_subtask, record.points, record.created,
+         record.resolution_date, record.updated, record.status_id, record.status_name, record.status_category,
+         status_events, sprint_events) = row
+        record.status_events = tuple(tuple(e) for e in status_events)
+        record.sprint_events = tuple(tuple(e) for e in sprint_events)
+        record.changelog_truncated = False
+        return record
+
+    def __repr__(self):
+        return f"IssueRecord({self.key!r}, status={self.status_id!r}, points={self.points})"
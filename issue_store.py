@@ -0,0 +1,65 @@
+import json
+from datetime import datetime
+
+from db import get_db
+from issue_records import IssueRecord
+
+
+def get_sprint_sync(db_file, sprint_id):
+    """
+    Returns (sprint_info, last_sync datetime) for a previously synced sprint, or None.
+    """
+    row = get_db(db_file).query_one('SELECT sprint_info, last_sync FROM sprint_sync WHERE sprint_id = ?', (sprint_id,))
+    if not row:
+        return None
+    return json.loads(row[0]), datetime.fromisoformat(row[1])
+
+
+def merge_sprint_issues(db_file, sprint_id, sprint_info, issues, synced_at, member_keys=None):
+    """
+    Upserts fetched IssueRecords into the store and records the sync time, in one transaction.
+    Fetched issues always replace stored copies (they are the newest version).
+    If member_keys is given, it is the complete membership of the sprint and replaces the old one.
+    """
+    issue_rows = [(i.key, i.updated, json.dumps(i.to_row(), separators=(',', ':'))) for i in issues]
+    with get_db(db_file).transaction() as c:
+        c.executemany('''
+            INSERT INTO jira_issues (issue_key, updated, data)
+            VALUES (?, ?, ?)
+            ON CONFLICT(issue_key) DO UPDATE SET
+                updated=excluded.updated,
+                data=excluded.data
+        ''', issue_rows)
+
+        if member_keys is not None:
+            c.execute('DELETE FROM sprint_issues WHERE sprint_id = ?', (sprint_id,))
+            c.executemany('INSERT OR IGNORE INTO sprint_issues (sprint_id, issue_key) VALUES (?, ?)',
+                          [(sprint_id, k) for k in member_keys])
+        else:
+            c.executemany('INSERT OR IGNORE INTO sprint_issues (sprint_id, issue_key) VALUES (?, ?)',
+                          [(sprint_id, i.key) for i in issues])
+
+        c.execute('''
+            INSERT INTO sprint_sync (sprint_id, sprint_info, last_sync)
+            VALUES (?, ?, ?)
+            ON CONFLICT(sprint_id) DO UPDATE SET
+                sprint_info=excluded.sprint_info,
+                last_sync=excluded.last_sync
+        ''', (sprint_id, json.dumps(sprint_info), synced_at.isoformat()))
+
+
+def load_sprint_issues(db_file, sprint_id):
+    """
+    Returns (sprint_info, IssueRecords) for a sprint entirely from local data.
+    """
+    db = get_db(db_file)
+    row = db.query_one('SELECT sprint_info FROM sprint_sync WHERE sprint_id = ?', (sprint_id,))
+    sprint_info = json.loads(row[0]) if row else {}
+    rows = db.query('''
+        SELECT i.data FROM sprint_issues s
+        JOIN jira_issues i ON i.issue_key = s.issue_key
+        WHERE s.sprint_id = ?
+        ORDER BY i.issue_key
+    ''', (sprint_id,))
+    issues = [IssueRecord.from_row(json.loads(r[0])) for r in rows]
+    return sprint_info, issues
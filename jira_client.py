@@ -0,0 +1,137 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from diagnostics import record_request
+
+# Default (connect, read) timeouts in seconds for every Jira call.
+DEFAULT_TIMEOUT = (5, 60)
+
+# Rate-limited (429) or briefly unavailable (503) calls are retried this many times,
+# waiting Retry-After seconds when Jira sends it, else an exponential backoff, capped at MAX_RETRY_WAIT.
+MAX_RETRIES = 4
+MAX_RETRY_WAIT = 30
+RETRY_STATUSES = (429, 503)
+
+
+class JiraClient:
+    """
+    Shared HTTP client for one Jira site.
+    Owns a pooled keep-alive session so repeated calls reuse the same TLS connections.
+    """
+
+    def __init__(self, domain, auth_header, max_workers=8, timeout=DEFAULT_TIMEOUT):
+        self.domain = domain
+        # A bare domain means Jira Cloud over HTTPS; an explicit scheme allows local stand-ins.
+        self.base_url = domain.rstrip("/") if "://" in domain else f"https://{domain}"
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers.update(auth_header)
+        self.session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        # One pool per host, sized so every worker thread can hold a live connection.
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._adapters = [adapter]
+
+        self._lock = threading.Lock()
+        self._request_count = 0
+        self._retry_count = 0
+
+    def url(self, path):
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}{path}"
+
+    def request(self, method, path, timeout=None, **kwargs):
+        """
+        Sends one Jira call, retrying rate-limited attempts, and records it in diagnostics:
+        endpoint, final status, response bytes, latency including any retry waits, and retries.
+        With stream=True the body is left unread (bytes are then the Content-Length, if sent).
+        """
+        attempt = 0
+        started = time.perf_counter()
+        while True:
+            with self._lock:
+                self._request_count += 1
+            try:
+                response = self.session.request(method, self.url(path), timeout=timeout or self.timeout, **kwargs)
+            except requests.RequestException:
+                record_request(method, path, None, 0, time.perf_counter() - started, attempt)
+                raise
+            if response.status_code not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+                if kwargs.get("stream"):
+                    nbytes = int(response.headers.get("Content-Length") or 0)
+                else:
+                    nbytes = len(response.content)
+                record_request(method, path, response.status_code, nbytes, time.perf_counter() - started, attempt)
+                return response
+            # Hand the connection back to the pool before waiting
+            response.close()
+            with self._lock:
+                self._retry_count += 1
+            time.sleep(self._retry_wait(response, attempt))
+            attempt += 1
+
+    @staticmethod
+    def _retry_wait(response, attempt):
+        try:
+            wait = float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            wait = 0.5 * 2 ** attempt
+        return min(max(wait, 0.0), MAX_RETRY_WAIT)
+
+    def get(self, path, params=None, timeout=None, **kwargs):
+        return self.request("GET", path, params=params, timeout=timeout, **kwargs)
+
+    def post(self, path, json=None, timeout=None, **kwargs):
+        return self.request("POST", path, json=json, timeout=timeout, **kwargs)
+
+    def stats(self):
+        """
+        Connection reuse statistics.
+        'connections' counts TLS/TCP connections actually opened; everything else was a reused socket.
+        """
+        connections = 0
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    connections += pool.num_connections
+        requests_made = self._request_count
+        reused = max(0, requests_made - connections)
+        return {
+            "requests": requests_made,
+            "retries": self._retry_count,
+            "connections": connections,
+            "reused": reused,
+            "reuse_pct": (reused / requests_made * 100) if requests_made > 0 else 0.0,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(domain, auth_header, max_workers=8):
+    """
+    Returns the process-wide client for this domain and credentials, creating it on first use.
+    """
+    key = (domain, auth_header.get("Authorization", ""))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = JiraClient(domain, auth_header, max_workers=max_workers)
+            _clients[key] = client
+        return client
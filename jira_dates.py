@@ -0,0 +1,85 @@
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# Jira sends the same handful of timestamps over and over (sprint dates, bulk transitions),
+# so parsed values are memoized by their exact string.
+CACHE_SIZE = 65536
+
+_COMPACT_OFFSET = re.compile(r'([+-]\d{2})(\d{2})$')
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _parse_fallback(value):
+    # Pythons before 3.11 reject 'Z' and '+0000' in fromisoformat
+    try:
+        return datetime.fromisoformat(_COMPACT_OFFSET.sub(r'\1:\2', value.replace('Z', '+00:00')))
+    except ValueError:
+        pass
+    try:
+        base = value.rsplit('+', 1)[0]
+        if len(base) > 19:
+            base = base[:19]
+        return datetime.strptime(base, "%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_jira_datetime(value):
+    """
+    Parses a Jira timestamp (e.g. 2025-01-07T09:00:00.000+0000) into an aware UTC datetime.
+    Naive input is taken as UTC. Returns None for empty or unparseable values.
+    """
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        dt = _parse_fallback(value)
+        if dt is None:
+            return None
+
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    if dt.utcoffset():
+        return dt.astimezone(timezone.utc)
+    return dt
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def jira_epoch_ms(value):
+    """
+    Jira timestamp as integer milliseconds since the epoch, or None.
+    """
+    dt = parse_jira_datetime(value)
+    if dt is None:
+        return None
+    delta = dt - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000 + delta.microseconds // 1000
+
+
+def jira_epochs(values, missing=None):
+    """
+    Batch mode: converts a whole column of Jira timestamps to epoch milliseconds.
+    Empty or unparseable entries become `missing`.
+    """
+    result = []
+    for value in values:
+        epoch = jira_epoch_ms(value) if value else None
+        result.append(missing if epoch is None else epoch)
+    return result
+
+
+def to_epoch_ms(dt):
+    """
+    Epoch milliseconds for a datetime (naive values are taken as UTC).
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    delta = dt - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000 + delta.microseconds // 1000
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
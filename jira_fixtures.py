@@ -0,0 +1,188 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+# Workflow the synthetic issues move through: (status id, name, category key)
+STATUSES = [
+    ("1", "To Do", "new"),
+    ("3", "In Progress", "indeterminate"),
+    ("10001", "In Review", "indeterminate"),
+    ("10002", "Done", "done"),
+]
+DONE_STATUS_IDS = {"10002"}
+
+SP_FIELD_ID = "customfield_10033"
+SPRINT_FIELD_ID = "customfield_10020"
+ISSUE_TYPES = ["Story", "Story", "Task", "Bug"]
+POINTS = [None, 1, 2, 3, 3, 5, 5, 8, 13]
+# Changelog fields that aren't replayed by the metrics, mixed in like a real tenant's
+NOISE_FIELDS = ["assignee", "Rank", "description", "labels", "priority"]
+
+
+def jira_timestamp(dt):
+    """
+    Formats a datetime the way Jira Cloud does, e.g. 2025-01-07T09:00:00.000+0000.
+    """
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+
+
+def make_sprints(count, first_id=1000, start=None, length_days=14, board_id=1, team_name="Team", active_last=True):
+    """
+    Board sprint listing entries, oldest first, back to back; the newest one is active if active_last.
+    """
+    start = start or datetime(2024, 1, 2, 9, tzinfo=timezone.utc)
+    sprints = []
+    for n in range(count):
+        begin = start + timedelta(days=n * length_days)
+        end = begin + timedelta(days=length_days)
+        active = active_last and n == count - 1
+        sprint = {
+            "id": first_id + n,
+            "self": f"https://example.atlassian.net/rest/agile/1.0/sprint/{first_id + n}",
+            "state": "active" if active else "closed",
+            "name": f"{team_name} Iteration {n + 1} {begin.year}",
+            "startDate": jira_timestamp(begin),
+            "endDate": jira_timestamp(end),
+            "originBoardId": board_id,
+            "goal": "",
+        }
+        if not active:
+            sprint["completeDate"] = jira_timestamp(end)
+        sprints.append(sprint)
+    return sprints
+
+
+def _sprint_ref(sprint):
+    return {key: sprint[key] for key in ("id", "name", "state", "startDate", "endDate", "completeDate") if key in sprint}
+
+
+def _status_item(from_status, to_status):
+    return {
+        "field": "status", "fieldtype": "jira", "fieldId": "status",
+        "from": from_status[0], "fromString": from_status[1],
+        "to": to_status[0], "toString": to_status[1],
+    }
+
+
+def _sprint_item(from_sprints, to_sprints):
+    return {
+        "field": "Sprint", "fieldtype": "custom", "fieldId": SPRINT_FIELD_ID,
+        "from": ", ".join(str(s["id"]) for s in from_sprints),
+        "fromString": ", ".join(s["name"] for s in from_sprints),
+        "to": ", ".join(str(s["id"]) for s in to_sprints),
+        "toString": ", ".join(s["name"] for s in to_sprints),
+    }
+
+
+def make_issues(sprint, count, previous_sprint=None, changelog_depth=8, subtask_ratio=0.1, sprint_churn=0.3,
+                noise_ratio=0.5, project="AB", first_number=1, seed=0):
+    """
+    Issues of one sprint shaped like an agile sprint/issue response with expand=changelog,
+    carrying the fields get_sprint_issues requests.
+    changelog_depth is the mean number of status transitions per issue; subtask_ratio the share of sub-tasks;
+    sprint_churn the share of issues added mid-sprint or carried over from previous_sprint;
+    noise_ratio the share of extra histories touching fields the metrics ignore.
+    The same arguments always produce the same issues.
+    """
+    rng = random.Random(seed)
+    start = datetime.strptime(sprint["startDate"], "%Y-%m-%dT%H:%M:%S.%f%z")
+    end = datetime.strptime(sprint.get("completeDate") or sprint["endDate"], "%Y-%m-%dT%H:%M:%S.%f%z")
+    span = (end - start).total_seconds()
+
+    issues = []
+    for n in range(count):
+        number = first_number + n
+        history_id = number * 1000
+        histories = []
+
+        def add_history(at, *items):
+            nonlocal history_id
+            history_id += 1
+            histories.append({
+                "id": str(history_id),
+                "author": {"accountId": f"user-{rng.randint(1, 12)}"},
+                "created": jira_timestamp(at),
+                "items": list(items),
+            })
+
+        # Most work is created before the sprint starts; some lands mid-sprint (unplanned)
+        created = start + timedelta(seconds=rng.uniform(-30 * 86400, 0.4 * span))
+        sprints = [sprint]
+        churn = rng.random() < sprint_churn
+        if churn and previous_sprint and created < start:
+            # Carried over: was in the previous sprint, moved in at planning
+            sprints = [previous_sprint, sprint]
+            add_history(start - timedelta(hours=rng.uniform(1, 48)), _sprint_item([previous_sprint], sprints))
+        elif churn:
+            # Pulled in after the sprint started
+            add_history(start + timedelta(seconds=rng.uniform(0.05, 0.8) * span), _sprint_item([], sprints))
+
+        status = STATUSES[0]
+        at = max(created, start - timedelta(days=3))
+        resolved = None
+        transitions = int(rng.expovariate(1 / changelog_depth)) if changelog_depth else 0
+        for _ in range(transitions):
+            at += timedelta(seconds=rng.uniform(0.02, 0.2) * span)
+            index = STATUSES.index(status)
+            # Mostly forward through the workflow, sometimes bounced back
+            if index == len(STATUSES) - 1 or (index > 0 and rng.random() < 0.2):
+                target = STATUSES[index - 1]
+            else:
+                target = STATUSES[index + 1]
+            add_history(at, _status_item(status, target))
+            status = target
+            resolved = at if status[0] in DONE_STATUS_IDS else None
+
+        for _ in range(int(len(histories) * noise_ratio + rng.random())):
+            field = rng.choice(NOISE_FIELDS)
+            add_history(created + timedelta(seconds=rng.uniform(0, span)),
+                        {"field": field, "fieldtype": "jira", "from": None, "fromString": "a", "to": None, "toString": "b"})
+
+        histories.sort(key=lambda h: h["created"])
+        is_subtask = rng.random() < subtask_ratio
+        updated = histories[-1]["created"] if histories else jira_timestamp(created)
+        issues.append({
+            "id": str(100000 + number),
+            "self": f"https://example.atlassian.net/rest/api/2/issue/{100000 + number}",
+            "key": f"{project}-{number}",
+            "fields": {
+                "summary": f"Synthetic issue {number}",
+                "status": {"id": status[0], "name": status[1], "statusCategory": {"key": status[2]}},
+                "issuetype": {"name": "Sub-task" if is_subtask else rng.choice(ISSUE_TYPES), "subtask": is_subtask},
+                "created": jira_timestamp(created),
+                "resolutiondate": jira_timestamp(resolved) if resolved else None,
+                "updated": updated,
+                "assignee": {"accountId": f"user-{rng.randint(1, 12)}", "displayName": f"User {rng.randint(1, 12)}"},
+                SP_FIELD_ID: None if is_subtask else rng.choice(POINTS),
+                SPRINT_FIELD_ID: [_sprint_ref(s) for s in sprints],
+            },
+            "changelog": {"startAt": 0, "maxResults": len(histories), "total": len(histories), "histories": histories},
+        })
+    return issues
+
+
+def make_board(sprint_count, issues_per_sprint, seed=0, **issue_options):
+    """
+    A board's sprints (oldest first) and {sprint_id: issues}, each sprint churning from the one before.
+    Issue keys are unique across the board.
+    """
+    sprints = make_sprints(sprint_count)
+    issues = {}
+    for n, sprint in enumerate(sprints):
+        issues[sprint["id"]] = make_issues(sprint, issues_per_sprint, previous_sprint=sprints[n - 1] if n else None,
+                                           first_number=n * issues_per_sprint + 1, seed=seed + n, **issue_options)
+    return sprints, issues
+
+
+def make_board_configuration(board_id=1):
+    """
+    Board configuration payload whose last column holds the done statuses.
+    """
+    columns = [{"name": name, "statuses": [{"id": status_id}]} for status_id, name, _ in STATUSES]
+    return {"id": board_id, "name": f"Board {board_id}", "columnConfig": {"columns": columns}}
+
+
+def make_bugs(count, project="BUG", first_number=1):
+    """
+    Bugs as returned by the Bugs In search (only key and id).
+    """
+    return [{"id": str(900000 + first_number + n), "key": f"{project}-{first_number + n}"} for n in range(count)]
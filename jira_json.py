@@ -0,0 +1,84 @@
+import json
+
+# Optional codecs: ijson parses issue pages incrementally straight off the socket;
+# without it pages are decoded in one go, by orjson when installed.
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Changelog fields kept while streaming; items for every other field are dropped as soon as they are parsed
+CHANGELOG_FIELDS = ("status", "Sprint")
+
+_ISSUE_PREFIX = "issues.item"
+_CHANGELOG_ITEM_PREFIX = "issues.item.changelog.histories.item.items.item"
+_PAGE_FIELDS = ("startAt", "maxResults", "total", "isLast")
+
+
+def loads(data):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def decode(response):
+    """
+    Whole JSON body of a response, via the fastest codec available.
+    """
+    return loads(response.content)
+
+
+def _stream_issue_page(response, convert):
+    """
+    Builds each issue from ijson events (inlined: this loop sees every token of the page),
+    dropping changelog items for fields outside CHANGELOG_FIELDS as each one closes.
+    """
+    page = {}
+    issues = []
+    stack = []
+    key = None
+    response.raw.decode_content = True
+    for prefix, event, value in ijson.parse(response.raw, use_float=True):
+        if not stack:
+            if prefix == _ISSUE_PREFIX and event == 'start_map':
+                stack.append({})
+            elif prefix in _PAGE_FIELDS:
+                page[prefix] = value
+        elif event == 'map_key':
+            key = value
+        elif event == 'end_map' or event == 'end_array':
+            done = stack.pop()
+            if not stack:
+                issues.append(convert(done) if convert else done)
+            elif prefix == _CHANGELOG_ITEM_PREFIX and done.get('field') not in CHANGELOG_FIELDS:
+                stack[-1].pop()
+        else:
+            if event == 'start_map':
+                value = {}
+            elif event == 'start_array':
+                value = []
+            top = stack[-1]
+            if top.__class__ is list:
+                top.append(value)
+            else:
+                top[key] = value
+            if event == 'start_map' or event == 'start_array':
+                stack.append(value)
+    return page, issues
+
+
+def decode_issue_page(response, convert=None):
+    """
+    Decodes an agile issue listing page into (page fields without 'issues', issues),
+    each issue passed through convert(issue) if given.
+    With ijson the body is parsed as it streams in (request it with stream=True), one issue at a time,
+    so a page never exists in memory as text plus a full object tree.
+    """
+    if ijson is not None and not response.raw.closed:
+        return _stream_issue_page(response, convert)
+    page = decode(response)
+    issues = page.pop('issues', [])
+    return page, [convert(i) for i in issues] if convert else issues
@@ -0,0 +1,417 @@
+"""
+Local stand-in for the Jira Cloud endpoints this app calls, for offline load and regression testing.
+
+    python jira_standin.py --sprints 20 --issues 200 --latency 0.05 --page-size 50 --throttle 0.02
+    python jira_standin.py --record recording.json --upstream yourcompany.atlassian.net
+    python jira_standin.py --replay recording.json
+
+Then point the app (or backfill.py --domain) at http://127.0.0.1:8080 with any credentials, board 1.
+Synthetic mode serves jira_fixtures data; record mode proxies to a real site once per distinct
+request and saves the responses; replay mode serves only what was recorded.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from jira_fixtures import (
+    make_board, make_board_configuration, make_bugs, jira_timestamp, SP_FIELD_ID, SPRINT_FIELD_ID,
+)
+
+# Jira's own caps: agile listings serve at most 50 sprints / 1000 issues a page,
+# expand=changelog inlines at most 100 histories per issue, and a bulk changelog
+# request names at most 1000 issues.
+SPRINT_PAGE_LIMIT = 50
+ISSUE_PAGE_LIMIT = 1000
+INLINE_CHANGELOG_LIMIT = 100
+BULK_CHANGELOG_ISSUE_LIMIT = 1000
+
+JQL_UPDATED_SINCE = re.compile(r'updated\s*>=\s*"([^"]+)"')
+JQL_DURING = re.compile(r'DURING\s*\(\s*"([^"]+)"\s*,\s*"([^"]+)"\s*\)')
+
+
+class SyntheticJira:
+    """
+    In-memory Jira site generated by jira_fixtures: one board of sprints, their issues and triaged bugs.
+    page_size caps every listing below Jira's own limits, to exercise paging; time_zone is the
+    user's timezone, in which JQL dates are read.
+    """
+
+    def __init__(self, board_id=1, sprint_count=10, issues_per_sprint=100, bugs_per_sprint=5, page_size=None,
+                 seed=0, time_zone="UTC", **issue_options):
+        self.board_id = board_id
+        self.page_size = page_size
+        self.time_zone = time_zone
+        self.sprints, self.sprint_issues = make_board(sprint_count, issues_per_sprint, seed=seed, **issue_options)
+        self.sprints_by_id = {s['id']: s for s in self.sprints}
+        self.issues_by_id = {i['id']: i for issues in self.sprint_issues.values() for i in issues}
+        self.issues_by_id.update({i['key']: i for i in self.issues_by_id.values()})
+        self.configuration = make_board_configuration(board_id)
+        self.fields = [
+            {"id": SP_FIELD_ID, "name": "Story Points", "custom": True},
+            {"id": SPRINT_FIELD_ID, "name": "Sprint", "custom": True},
+        ]
+        self.bugs = self._make_bugs(bugs_per_sprint, seed)
+        self.issues_by_id.update({key: b for b in self.bugs for key in (b['id'], b['key'])})
+
+    def _make_bugs(self, bugs_per_sprint, seed):
+        """
+        Bugs triaged at random times across the board's history, each with its Triaged transition.
+        """
+        rng = random.Random(seed)
+        first = datetime.strptime(self.sprints[0]['startDate'], "%Y-%m-%dT%H:%M:%S.%f%z")
+        last = datetime.strptime(self.sprints[-1]['endDate'], "%Y-%m-%dT%H:%M:%S.%f%z")
+        bugs = make_bugs(bugs_per_sprint * len(self.sprints))
+        for bug in bugs:
+            self._triage(bug, first + (last - first) * rng.random())
+        return bugs
+
+    @staticmethod
+    def _triage(bug, triaged, earlier_histories=0):
+        created = triaged - timedelta(hours=2)
+        bug['fields'] = {"issuetype": {"name": "Bug"}, "created": jira_timestamp(created)}
+        # Label edits between creation and triage, only to lengthen the changelog
+        histories = [{
+            "id": f"{bug['id']}-{n}",
+            "created": jira_timestamp(created + timedelta(seconds=n + 1)),
+            "items": [{"field": "labels", "fieldId": "labels", "fromString": "", "toString": f"edit-{n}"}],
+        } for n in range(earlier_histories)]
+        histories.append({
+            "id": str(int(bug['id']) - 100000),
+            "created": jira_timestamp(triaged),
+            "items": [{"field": "status", "fieldId": "status", "from": "1", "fromString": "New",
+                       "to": "10100", "toString": "Triaged"}],
+        })
+        bug['changelog'] = {"histories": histories}
+
+    @staticmethod
+    def _triaged_at(bug):
+        return datetime.strptime(bug['changelog']['histories'][-1]['created'], "%Y-%m-%dT%H:%M:%S.%f%z")
+
+    def add_triaged_bug(self, key, triaged, earlier_histories=0):
+        """
+        Adds a bug moved to Triaged at the given aware datetime, e.g. to place one right at a window edge.
+        earlier_histories unrelated changes before the triage push it past the inline changelog limit.
+        """
+        bug = {"id": str(900000 + len(self.bugs) + 1), "key": key}
+        self._triage(bug, triaged, earlier_histories)
+        self.bugs.append(bug)
+        self.issues_by_id.update({bug['id']: bug, key: bug})
+        return bug
+
+    def _limit(self, requested, cap):
+        limit = min(int(requested), cap)
+        return min(limit, self.page_size) if self.page_size else limit
+
+    def handle(self, method, path, query, body):
+        """
+        Returns (status, payload) for one request.
+        """
+        routes = [
+            ("GET", r"/rest/agile/1.0/board/(\d+)/sprint", self.board_sprints),
+            ("GET", r"/rest/agile/1.0/board/(\d+)/configuration", self.board_configuration),
+            ("GET", r"/rest/agile/1.0/sprint/(\d+)", self.sprint),
+            ("GET", r"/rest/agile/1.0/sprint/(\d+)/issue", self.sprint_issue_page),
+            ("GET", r"/rest/api/3/search/jql", self.search),
+            ("POST", r"/rest/api/3/changelog/bulkfetch", self.bulk_changelogs),
+            ("GET", r"/rest/api/3/field", self.field_list),
+            ("GET", r"/rest/api/3/myself", self.myself),
+        ]
+        for route_method, pattern, handler in routes:
+            match = re.fullmatch(pattern, path)
+            if match and route_method == method:
+                return handler(query, body, *match.groups())
+        return 404, {"errorMessages": [f"No stand-in route for {method} {path}"]}
+
+    def board_sprints(self, query, body, board_id):
+        if int(board_id) != self.board_id:
+            return 404, {"errorMessages": [f"Board {board_id} does not exist"]}
+        states = set(query.get('state', 'active,closed,future').split(','))
+        values = [s for s in self.sprints if s['state'] in states]
+        start_at = int(query.get('startAt', 0))
+        limit = self._limit(query.get('maxResults', SPRINT_PAGE_LIMIT), SPRINT_PAGE_LIMIT)
+        page = values[start_at:start_at + limit]
+        return 200, {"maxResults": limit, "startAt": start_at, "total": len(values),
+                     "isLast": start_at + limit >= len(values), "values": page}
+
+    def board_configuration(self, query, body, board_id):
+        if int(board_id) != self.board_id:
+            return 404, {"errorMessages": [f"Board {board_id} does not exist"]}
+        return 200, self.configuration
+
+    def sprint(self, query, body, sprint_id):
+        sprint = self.sprints_by_id.get(int(sprint_id))
+        if sprint is None:
+            return 404, {"errorMessages": [f"Sprint {sprint_id} does not exist"]}
+        return 200, sprint
+
+    def sprint_issue_page(self, query, body, sprint_id):
+        issues = self.sprint_issues.get(int(sprint_id))
+        if issues is None:
+            return 404, {"errorMessages": [f"Sprint {sprint_id} does not exist"]}
+        since = JQL_UPDATED_SINCE.search(query.get('jql', ''))
+        if since:
+            # JQL dates are read in the user's timezone, like DURING in search
+            since_at = datetime.strptime(since.group(1), "%Y-%m-%d %H:%M").replace(tzinfo=ZoneInfo(self.time_zone))
+            cutoff = jira_timestamp(since_at)
+            issues = [i for i in issues if i['fields']['updated'] >= cutoff]
+        start_at = int(query.get('startAt', 0))
+        limit = self._limit(query.get('maxResults', 50), ISSUE_PAGE_LIMIT)
+        fields = [f for f in query.get('fields', '').split(',') if f]
+        expand_changelog = 'changelog' in query.get('expand', '')
+        page = [self._shape_issue(i, fields, expand_changelog) for i in issues[start_at:start_at + limit]]
+        return 200, {"expand": "schema,names", "startAt": start_at, "maxResults": limit, "total": len(issues), "issues": page}
+
+    @staticmethod
+    def _shape_issue(issue, fields, expand_changelog):
+        shaped = {k: issue[k] for k in ("id", "key", "self") if k in issue}
+        shaped['fields'] = {k: v for k, v in issue['fields'].items() if not fields or k in fields}
+        if expand_changelog:
+            histories = issue['changelog']['histories']
+            shaped['changelog'] = {"startAt": 0, "maxResults": min(len(histories), INLINE_CHANGELOG_LIMIT),
+                                   "total": len(histories), "histories": histories[:INLINE_CHANGELOG_LIMIT]}
+        return shaped
+
+    def search(self, query, body):
+        jql = query.get('jql', '')
+        bugs = self.bugs
+        window = JQL_DURING.search(jql)
+        if window:
+            # DURING is inclusive of whole days, in the user's timezone
+            tz = ZoneInfo(self.time_zone)
+            start = datetime.strptime(window.group(1), "%Y-%m-%d").replace(tzinfo=tz)
+            end = datetime.strptime(window.group(2), "%Y-%m-%d").replace(tzinfo=tz) + timedelta(days=1)
+            bugs = [b for b in bugs if start <= self._triaged_at(b) < end]
+        start_at = int(query.get('nextPageToken') or 0)
+        limit = self._limit(query.get('maxResults', 50), 5000)
+        fields = [f for f in query.get('fields', '').split(',') if f]
+        expand_changelog = 'changelog' in query.get('expand', '')
+        page = [self._shape_issue(b, fields, expand_changelog) for b in bugs[start_at:start_at + limit]]
+        payload = {"issues": page, "isLast": start_at + limit >= len(bugs)}
+        if not payload['isLast']:
+            payload['nextPageToken'] = str(start_at + limit)
+        return 200, payload
+
+    def bulk_changelogs(self, query, body, *groups):
+        keys = body.get('issueIdsOrKeys', [])
+        if len(keys) > BULK_CHANGELOG_ISSUE_LIMIT:
+            return 400, {"errorMessages": [f"At most {BULK_CHANGELOG_ISSUE_LIMIT} issues can be requested at once"]}
+        field_ids = set(body.get('fieldIds') or [])
+        pairs = []
+        for key in keys:
+            issue = self.issues_by_id.get(str(key))
+            if issue is None:
+                continue
+            for history in issue['changelog']['histories']:
+                items = [item for item in history['items'] if not field_ids or item.get('fieldId') in field_ids]
+                if items:
+                    pairs.append((issue['id'], {**history, 'items': items}))
+        offset = int(body.get('nextPageToken') or 0)
+        limit = self._limit(body.get('maxResults', 1000), 1000)
+        logs = {}
+        for issue_id, history in pairs[offset:offset + limit]:
+            logs.setdefault(issue_id, []).append(history)
+        payload = {"issueChangeLogs": [{"issueId": i, "changeHistories": h} for i, h in logs.items()]}
+        if offset + limit < len(pairs):
+            payload['nextPageToken'] = str(offset + limit)
+        return 200, payload
+
+    def field_list(self, query, body):
+        return 200, self.fields
+
+    def myself(self, query, body):
+        return 200, {"accountId": "standin-user", "displayName": "Stand-in User", "timeZone": self.time_zone}
+
+
+def request_key(method, path, query, body):
+    """
+    Identifies a request in a recording: method, path, sorted query and (for POST) the JSON body.
+    """
+    key = f"{method} {path}"
+    if query:
+        key += "?" + urllib.parse.urlencode(sorted(query.items()))
+    if body is not None:
+        key += " " + json.dumps(body, sort_keys=True, separators=(',', ':'))
+    return key
+
+
+class Recording:
+    """
+    Responses captured from a real Jira site, keyed by request_key and saved as JSON.
+    With an upstream, unseen requests are forwarded once (with the caller's Authorization) and saved;
+    without one, unseen requests get a 404.
+    """
+
+    def __init__(self, path, upstream=None):
+        self.path = path
+        self.upstream = None
+        if upstream:
+            self.upstream = upstream.rstrip('/') if "://" in upstream else f"https://{upstream}"
+        self.lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.responses = json.load(f)
+        except FileNotFoundError:
+            self.responses = {}
+        self.session = requests.Session()
+
+    def handle(self, method, path, query, body, authorization=None):
+        key = request_key(method, path, query, body)
+        with self.lock:
+            recorded = self.responses.get(key)
+        if recorded is not None:
+            return recorded['status'], recorded['body']
+        if not self.upstream:
+            return 404, {"errorMessages": [f"Not recorded: {key}"]}
+
+        headers = {"Accept": "application/json"}
+        if authorization:
+            headers["Authorization"] = authorization
+        r = self.session.request(method, self.upstream + path, params=query, json=body, headers=headers, timeout=(5, 60))
+        try:
+            payload = r.json()
+        except ValueError:
+            payload = {"errorMessages": [r.text[:500]]}
+        if r.status_code not in (429, 503):
+            with self.lock:
+                self.responses[key] = {"status": r.status_code, "body": payload}
+                with open(self.path, "w") as f:
+                    json.dump(self.responses, f)
+        return r.status_code, payload
+
+
+class StandinSettings:
+    """
+    Network behaviour applied to every response: latency (+ random jitter) in seconds and the
+    share of requests answered with 429 Too Many Requests (with Retry-After: retry_after).
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, throttle=0.0, retry_after=1, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+
+    def next_delay_and_throttle(self):
+        with self._lock:
+            self.requests += 1
+            throttle = self._rng.random() < self.throttle
+            if throttle:
+                self.throttled += 1
+            return self.latency + self._rng.uniform(0, self.jitter), throttle
+
+
+def make_handler(backend, settings):
+    class StandinHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self, method):
+            parsed = urllib.parse.urlparse(self.path)
+            query = dict(urllib.parse.parse_qsl(parsed.query))
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+
+            delay, throttle = settings.next_delay_and_throttle()
+            if delay:
+                time.sleep(delay)
+            if throttle:
+                status, payload, extra = 429, {"errorMessages": ["Rate limit exceeded"]}, {"Retry-After": str(settings.retry_after)}
+            else:
+                if isinstance(backend, Recording):
+                    status, payload = backend.handle(method, parsed.path, query, body, self.headers.get('Authorization'))
+                else:
+                    status, payload = backend.handle(method, parsed.path, query, body)
+                extra = {}
+
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in extra.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._respond("GET")
+
+        def do_POST(self):
+            self._respond("POST")
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandinHandler
+
+
+def start_standin(backend, settings=None, host="127.0.0.1", port=0):
+    """
+    Serves backend (SyntheticJira or Recording) on a background thread.
+    Returns (server, base_url); call server.shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(backend, settings or StandinSettings()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Jira stand-in server (synthetic, record or replay).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--record", metavar="FILE", help="Record responses from --upstream into FILE")
+    parser.add_argument("--upstream", help="Real Jira site to record from, e.g. yourcompany.atlassian.net")
+    parser.add_argument("--replay", metavar="FILE", help="Serve only the responses recorded in FILE")
+    parser.add_argument("--board", type=int, default=1, help="Synthetic board ID")
+    parser.add_argument("--sprints", type=int, default=10, help="Synthetic sprints on the board")
+    parser.add_argument("--issues", type=int, default=100, help="Synthetic issues per sprint")
+    parser.add_argument("--changelog-depth", type=float, default=8, help="Mean status transitions per synthetic issue")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-zone", default="UTC", help="Synthetic user's timezone, in which JQL dates are read")
+    parser.add_argument("--page-size", type=int, help="Cap every synthetic page at this many results")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random seconds, up to this much")
+    parser.add_argument("--throttle", type=float, default=0.0, help="Share of requests answered with 429 (0-1)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with a 429")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        if not args.upstream:
+            parser.error("--record needs --upstream")
+        backend = Recording(args.record, upstream=args.upstream)
+        mode = f"recording {args.upstream} into {args.record}"
+    elif args.replay:
+        backend = Recording(args.replay)
+        mode = f"replaying {len(backend.responses)} responses from {args.replay}"
+    else:
+        backend = SyntheticJira(board_id=args.board, sprint_count=args.sprints, issues_per_sprint=args.issues,
+                                page_size=args.page_size, seed=args.seed, time_zone=args.time_zone,
+                                changelog_depth=args.changelog_depth)
+        mode = f"synthetic board {args.board}: {args.sprints} sprints x {args.issues} issues"
+
+    settings = StandinSettings(latency=args.latency, jitter=args.jitter, throttle=args.throttle,
+                               retry_after=args.retry_after, seed=args.seed)
+    server, url = start_standin(backend, settings, host=args.host, port=args.port)
+    print(f"Jira stand-in at {url} ({mode}); Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Served {settings.requests} requests ({settings.throttled} throttled)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import json
+import time
+
+from db import get_db
+
+# Default time-to-live per kind of board metadata, in seconds
+SPRINT_LIST_TTL = 10 * 60
+BOARD_CONFIG_TTL = 24 * 60 * 60
+FIELDS_TTL = 24 * 60 * 60
+USER_TTL = 24 * 60 * 60
+
+
+def cache_lookup(db_file, cache_key):
+    """
+    Returns (value, is_fresh) for a cached entry, or (None, False) if there is none.
+    Stale values are still returned so callers can refresh them incrementally or fall back on errors.
+    """
+    row = get_db(db_file).query_one('SELECT value, fetched_at, ttl FROM jira_metadata WHERE cache_key = ?', (cache_key,))
+    if not row:
+        return None, False
+    value, fetched_at, ttl = row
+    return json.loads(value), time.time() - fetched_at <= ttl
+
+
+def cache_put(db_file, cache_key, value, ttl):
+    get_db(db_file).execute('''
+        INSERT INTO jira_metadata (cache_key, value, fetched_at, ttl)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(cache_key) DO UPDATE SET
+            value=excluded.value,
+            fetched_at=excluded.fetched_at,
+            ttl=excluded.ttl
+    ''', (cache_key, json.dumps(value), time.time(), ttl))
+
+
+def cache_invalidate(db_file, prefix=None):
+    """
+    Drops every cached entry, or only those whose key starts with prefix.
+    """
+    db = get_db(db_file)
+    if prefix:
+        db.execute('DELETE FROM jira_metadata WHERE substr(cache_key, 1, ?) = ?', (len(prefix), prefix))
+    else:
+        db.execute('DELETE FROM jira_metadata')
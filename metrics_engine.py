@@ -0,0 +1,254 @@
+from bisect import bisect_right
+from datetime import timedelta
+from operator import itemgetter
+
+import numpy as np
+
+from jira_dates import parse_jira_datetime, jira_epochs, to_epoch_ms, EPOCH
+
+# Sentinel for "no timestamp" in epoch-millisecond columns; compares below every real time
+MISSING_MS = np.iinfo(np.int64).min
+
+
+class IssueTimeline:
+    """
+    Status history of one IssueRecord, built once from its status and Sprint events.
+    Change timestamps and resulting status IDs are kept in parallel sorted lists,
+    so the status at any instant is a single bisect.
+    """
+    __slots__ = ('current_status_id', 'initial_status_id', 'times', 'status_ids', 'sprint_changes')
+
+    def __init__(self, record):
+        # Current status ID (fallback if no history found relative to date)
+        self.current_status_id = record.status_id
+
+        status_changes = []
+        for created, from_id, to_id in record.status_events:
+            created = parse_jira_datetime(created)
+            if created is not None:
+                status_changes.append((created, from_id, to_id))
+        sprint_changes = []
+        for created, to_sprints in record.sprint_events:
+            created = parse_jira_datetime(created)
+            if created is not None:
+                sprint_changes.append((created, to_sprints))
+
+        # Stable sort keeps the changelog order for changes made in the same instant
+        status_changes.sort(key=itemgetter(0))
+
+        self.times = [change[0] for change in status_changes]
+        self.status_ids = [change[2] for change in status_changes]
+        # Before the first change the issue was in that change's 'from' status
+        self.initial_status_id = status_changes[0][1] if status_changes else self.current_status_id
+        self.sprint_changes = sprint_changes
+
+    def status_at(self, target_date):
+        """
+        Status ID at target_date: the last change at or before it, else the initial status.
+        """
+        if not target_date or not self.times:
+            return self.current_status_id
+        idx = bisect_right(self.times, target_date)
+        return self.status_ids[idx - 1] if idx else self.initial_status_id
+
+    def first_added(self, sprint_id, sprint_name):
+        """
+        Earliest time a Sprint-field change put the issue into this sprint, or None.
+        Matches on sprint ID or name, as Jira's changelog may carry either.
+        """
+        earliest = None
+        sprint_id_str = str(sprint_id)
+        for created, to_sprints_str in self.sprint_changes:
+            # Strip whitespace from each item after splitting
+            to_sprints_list = [s.strip() for s in to_sprints_str.split(',')]
+
+            # Check: ID or Name (stripped)
+            if sprint_id_str in to_sprints_list or sprint_name in to_sprints_list or sprint_name in to_sprints_str:
+                if earliest is None or created < earliest:
+                    earliest = created
+        return earliest
+
+
+class SprintColumns:
+    """
+    One sprint's issues flattened into parallel arrays (one row per issue, sub-tasks included).
+    Status IDs are dictionary-encoded: *_codes index into status_values.
+    """
+    __slots__ = (
+        'sprint_start_ms', 'sprint_end_ms',
+        'keys', 'types', 'status_names', 'points', 'created_ms', 'resolution_ms', 'first_added_ms',
+        'is_subtask', 'is_done_category', 'start_codes', 'end_codes', 'status_values',
+    )
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def flatten_sprint(sprint_info, issues):
+    """
+    Flattens IssueRecords into SprintColumns, reconstructing status at sprint start/end
+    and the first Sprint addition per issue. Returns None if the sprint has not started.
+    """
+    sprint_start = parse_jira_datetime(sprint_info.get('startDate'))
+    sprint_end = parse_jira_datetime(sprint_info.get('completeDate'))
+    if not sprint_start:
+        return None
+
+    sprint_id = sprint_info['id']
+    sprint_name = sprint_info.get('name', '')
+
+    status_codes = {}
+    keys, types, status_names = [], [], []
+    points, created, resolution, first_added = [], [], [], []
+    is_subtask, is_done_category, start_codes, end_codes = [], [], [], []
+
+    for issue in issues:
+        timeline = IssueTimeline(issue)
+        # If sprint is active (sprint_end is None), status at end is the current status
+        status_id_at_start = timeline.status_at(sprint_start)
+        status_id_at_end = timeline.status_at(sprint_end)
+
+        keys.append(issue.key)
+        types.append(issue.issue_type)
+        status_names.append(issue.status_name)
+        points.append(issue.points)
+        created.append(issue.created)
+        resolution.append(issue.resolution_date)
+        added = timeline.first_added(sprint_id, sprint_name)
+        first_added.append(to_epoch_ms(added) if added else MISSING_MS)
+        is_subtask.append(issue.is_subtask)
+        is_done_category.append(issue.status_category == 'done')
+        start_codes.append(status_codes.setdefault(status_id_at_start, len(status_codes)))
+        end_codes.append(status_codes.setdefault(status_id_at_end, len(status_codes)))
+
+    cols = SprintColumns()
+    cols.sprint_start_ms = to_epoch_ms(sprint_start)
+    cols.sprint_end_ms = to_epoch_ms(sprint_end) if sprint_end else None
+    cols.keys = keys
+    cols.types = np.array(types, dtype=str)
+    cols.status_names = status_names
+    cols.points = np.array(points, dtype=np.float64)
+    cols.created_ms = np.array(jira_epochs(created, missing=MISSING_MS), dtype=np.int64)
+    cols.resolution_ms = np.array(jira_epochs(resolution, missing=MISSING_MS), dtype=np.int64)
+    cols.first_added_ms = np.array(first_added, dtype=np.int64)
+    cols.is_subtask = np.array(is_subtask, dtype=bool)
+    cols.is_done_category = np.array(is_done_category, dtype=bool)
+    cols.start_codes = np.array(start_codes, dtype=np.int32)
+    cols.end_codes = np.array(end_codes, dtype=np.int32)
+    cols.status_values = list(status_codes)
+    return cols
+
+
+def _format_ms(ms):
+    return str(EPOCH + timedelta(milliseconds=int(ms)))
+
+
+def completion_pct(velocity, final_capacity):
+    """
+    Total completion % -- the only metric that depends on capacity, so it can be redone without the issues.
+    """
+    return (velocity / final_capacity * 100) if final_capacity > 0 else 0.0
+
+
+def compute_stats(cols, bugs_in_count, final_capacity, done_status_ids, breakdown=None):
+    """
+    Vectorized sprint metrics over SprintColumns. Returns the metrics dict.
+    Pass a list as `breakdown` to also collect per-issue rows; with None no row work is done at all.
+    """
+    # --- Sub-task Filter ---
+    keep = ~cols.is_subtask
+    points = cols.points[keep]
+    start_ms = cols.sprint_start_ms
+    end_ms = cols.sprint_end_ms
+
+    # --- Completion at Sprint End ---
+    if done_status_ids:
+        done_codes = [code for code, status_id in enumerate(cols.status_values) if status_id in done_status_ids]
+        completed = np.isin(cols.end_codes[keep], done_codes)
+        done_at_start = np.isin(cols.start_codes[keep], done_codes)
+    else:
+        # Fallback: current status category is done and resolved before sprint end (or sprint active)
+        done_category = cols.is_done_category[keep]
+        if end_ms is None:
+            completed = done_category
+        else:
+            resolution = cols.resolution_ms[keep]
+            completed = done_category & (resolution != MISSING_MS) & (resolution <= end_ms)
+        done_at_start = np.zeros(len(points), dtype=bool)
+
+    # --- Unplanned: created after start, else added to the sprint after start ---
+    created = cols.created_ms[keep]
+    first_added = cols.first_added_ms[keep]
+    created_after = (created != MISSING_MS) & (created > start_ms)
+    added_after = ~created_after & (first_added != MISSING_MS) & (first_added > start_ms)
+    unplanned = created_after | added_after
+    planned = ~unplanned
+
+    # "Completed Outside Sprint": entered the sprint done and ended it done
+    completed_outside = done_at_start & completed
+    is_bug = np.char.lower(cols.types[keep]) == 'bug'
+    bugs_out = completed & is_bug & ~completed_outside
+
+    completed_total_sp = float(points[completed].sum())
+    completed_planned = float(points[completed & planned].sum())
+    completed_unplanned = float(points[completed & unplanned].sum())
+    sprint_start_sp = float(points[planned].sum())
+    total_unplanned_sp = float(points[unplanned].sum())
+    all_sprint_tasks_count = int(keep.sum())
+    incomplete_count = int((~completed).sum())
+
+    carryover_pct = (incomplete_count / all_sprint_tasks_count * 100) if all_sprint_tasks_count > 0 else 0.0
+    planned_pct = (completed_planned / sprint_start_sp * 100) if sprint_start_sp > 0 else 0.0
+    completion_pct_total = completion_pct(completed_total_sp, final_capacity)
+
+    metrics = {
+        "velocity": completed_total_sp,
+        "completed_planned": completed_planned,
+        "completed_unplanned": completed_unplanned,
+        "carryover_pct": carryover_pct,
+        "bugs_in": bugs_in_count,
+        "bugs_out": int(bugs_out.sum()),
+        "bugs_out_sp": float(points[bugs_out].sum()),
+        "completion_pct_total": completion_pct_total,
+        "planned_pct": planned_pct,
+        "unplanned_pct": (completed_unplanned / total_unplanned_sp * 100) if total_unplanned_sp > 0 else 0.0,
+        "planned_sp": sprint_start_sp,
+        "unplanned_sp": total_unplanned_sp,
+        "task_count_completed": all_sprint_tasks_count - incomplete_count,
+        "task_count_incomplete": incomplete_count,
+        "task_count_total": all_sprint_tasks_count
+    }
+
+    if breakdown is None:
+        return metrics
+
+    # --- Breakdown ---
+    if done_status_ids:
+        results = np.where(completed, "Completed", "Status not Done @ End").astype(object)
+    elif end_ms is None:
+        results = np.where(completed, "Completed (Active)", "Not Done (Fallback)").astype(object)
+    else:
+        results = np.where(completed, "Completed (Fallback)", "Not Done (Fallback)").astype(object)
+    results[completed_outside] = "Completed Outside"
+
+    rows = np.flatnonzero(keep).tolist()
+    reasons = np.where(created_after, "Created after start", "Planned").astype(object)
+    for n in np.flatnonzero(added_after).tolist():
+        reasons[n] = f"Added at {_format_ms(first_added[n])}"
+    status_end_ids = [cols.status_values[code] for code in cols.end_codes[keep].tolist()]
+    breakdown.extend(
+        {
+            "Key": cols.keys[row],
+            "Type": issue_type,
+            "Points": sp,
+            "Current Status": cols.status_names[row],
+            "Status ID @ End": status_id,
+            "Stats Result": result,
+            "Is Unplanned": is_unplanned,
+            "Reason": reason,
+        }
+        for row, issue_type, sp, status_id, result, is_unplanned, reason in zip(
+            rows, cols.types[keep].tolist(), points.tolist(), status_end_ids,
+            results.tolist(), unplanned.tolist(), reasons.tolist())
+    )
+    return metrics
@@ -0,0 +1,202 @@
+import pandas as pd
+
+from db import get_db
+
+METRICS_UPSERT = '''
+    INSERT INTO sprint_metrics (
+        board_id, team_id, sprint_id, sprint_name, velocity, completed_planned, completed_unplanned,
+        carryover_pct, bugs_in, bugs_out, completion_pct_total, planned_pct,
+        planned_sp, unplanned_sp, unplanned_pct,
+        task_count_completed, task_count_incomplete, task_count_total, bugs_out_sp
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(board_id, team_id, sprint_id) DO UPDATE SET
+        sprint_name=excluded.sprint_name,
+        velocity=excluded.velocity,
+        completed_planned=excluded.completed_planned,
+        completed_unplanned=excluded.completed_unplanned,
+        carryover_pct=excluded.carryover_pct,
+        bugs_in=excluded.bugs_in,
+        bugs_out=excluded.bugs_out,
+        completion_pct_total=excluded.completion_pct_total,
+        planned_pct=excluded.planned_pct,
+        unplanned_pct=excluded.unplanned_pct,
+        planned_sp=excluded.planned_sp,
+        unplanned_sp=excluded.unplanned_sp,
+        task_count_completed=excluded.task_count_completed,
+        task_count_incomplete=excluded.task_count_incomplete,
+        task_count_total=excluded.task_count_total,
+        bugs_out_sp=excluded.bugs_out_sp
+'''
+
+# Rolling statistics in sprint_metrics_rollup: each sprint's row covers it and the
+# ROLLING_SPRINTS - 1 sprints before it (by sprint id) of the same board and team
+ROLLING_SPRINTS = 5
+# (column prefix in the rollup, sprint_metrics column)
+ROLLUP_METRICS = [
+    ('velocity', 'velocity'),
+    ('completion', 'completion_pct_total'),
+    ('bugs_in', 'bugs_in'),
+    ('bugs_out', 'bugs_out'),
+]
+ROLLUP_COLUMNS = [f'{name}_{stat}' for name, _ in ROLLUP_METRICS for stat in ('avg', 'std', 'min', 'max')]
+
+
+def _rollup_stats():
+    stats = []
+    for _, column in ROLLUP_METRICS:
+        mean = f'AVG({column}) OVER w'
+        stats += [
+            mean,
+            # Population standard deviation; max() absorbs rounding below zero
+            f'sqrt(max(AVG({column} * {column}) OVER w - {mean} * {mean}, 0))',
+            f'MIN({column}) OVER w',
+            f'MAX({column}) OVER w',
+        ]
+    return ', '.join(stats)
+
+
+ROLLUP_REFRESH = f'''
+    INSERT INTO sprint_metrics_rollup (board_id, team_id, sprint_id, sprint_count, {', '.join(ROLLUP_COLUMNS)})
+    SELECT board_id, team_id, sprint_id, COUNT(*) OVER w, {_rollup_stats()}
+    FROM sprint_metrics
+    WHERE board_id = ? AND team_id = ?
+    WINDOW w AS (ORDER BY sprint_id ROWS BETWEEN {ROLLING_SPRINTS - 1} PRECEDING AND CURRENT ROW)
+'''
+
+
+class _MetricsCache:
+    """
+    Per-database cache of sprint_metrics rows.
+    rows maps (board_id, team_id, sprint_id) -> row tuple, or None for sprints known to have no metrics yet.
+    """
+
+    def __init__(self):
+        self.data_version = None
+        self.columns = None
+        self.rows = {}
+
+    def clear(self):
+        self.rows.clear()
+
+
+# Lives at module level so it survives Streamlit reruns (app.py is re-executed, imports are not)
+_caches = {}
+
+
+def _cache_for(db):
+    """
+    Returns the cache for db, dropped first if another connection (e.g. a backfill process) committed since.
+    Must be called with db.lock held.
+    """
+    cache = _caches.get(db.path)
+    if cache is None:
+        cache = _caches[db.path] = _MetricsCache()
+    # data_version only moves for commits made through other connections; our own writes invalidate explicitly
+    version = db.conn.execute('PRAGMA data_version').fetchone()[0]
+    if version != cache.data_version:
+        cache.clear()
+        cache.data_version = version
+    if cache.columns is None:
+        cursor = db.conn.execute('SELECT * FROM sprint_metrics LIMIT 0')
+        cache.columns = [d[0] for d in cursor.description]
+    return cache
+
+
+def _frame(cache, rows):
+    return pd.DataFrame(rows, columns=cache.columns)
+
+
+def invalidate_metrics(db_file, keys=None):
+    """
+    Forgets cached metrics for the given (board_id, team_id, sprint_id) keys, or everything if not given.
+    """
+    db = get_db(db_file)
+    with db.lock:
+        cache = _caches.get(db.path)
+        if cache is None:
+            return
+        if keys is None:
+            cache.clear()
+            cache.columns = None
+            return
+        for key in keys:
+            cache.rows.pop(tuple(key), None)
+
+
+def save_metrics_rows(db_file, rows):
+    """
+    Upserts sprint_metrics rows (as built by metrics_row) in one transaction and invalidates them.
+    """
+    if not rows:
+        return
+    db = get_db(db_file)
+    with db.lock:
+        with db.transaction() as c:
+            c.executemany(METRICS_UPSERT, rows)
+            refresh_rollups(c, {row[:2] for row in rows})
+        invalidate_metrics(db_file, [row[:3] for row in rows])
+
+
+def refresh_rollups(c, scopes=None):
+    """
+    Recomputes sprint_metrics_rollup for the given (board_id, team_id) scopes, or all of them, with one
+    window-function pass over each scope's metrics. Runs on the caller's cursor, inside its transaction.
+    """
+    if scopes is None:
+        scopes = c.execute('SELECT DISTINCT board_id, team_id FROM sprint_metrics').fetchall()
+    for scope in scopes:
+        c.execute('DELETE FROM sprint_metrics_rollup WHERE board_id = ? AND team_id = ?', scope)
+        c.execute(ROLLUP_REFRESH, scope)
+
+
+def get_metrics_for(db_file, board_id, team_id, sprint_ids):
+    """
+    Metrics rows of a board and team for sprint_ids, in that order; sprints without metrics are left out.
+    Only ids not cached yet hit the database, in a single primary-key lookup.
+    The returned DataFrame is freshly built and safe to modify.
+    """
+    db = get_db(db_file)
+    with db.lock:
+        cache = _cache_for(db)
+        scope = (board_id, team_id)
+        missing = [sid for sid in dict.fromkeys(sprint_ids) if scope + (sid,) not in cache.rows]
+        if missing:
+            placeholders = ','.join('?' * len(missing))
+            fetched = db.query(f'''
+                SELECT * FROM sprint_metrics
+                WHERE board_id = ? AND team_id = ? AND sprint_id IN ({placeholders})
+            ''', [board_id, team_id] + missing)
+            for row in fetched:
+                cache.rows[row[:3]] = row
+            for sid in missing:
+                cache.rows.setdefault(scope + (sid,), None)
+        rows = [cache.rows[scope + (sid,)] for sid in sprint_ids if cache.rows[scope + (sid,)] is not None]
+        return _frame(cache, rows)
+
+
+def get_metrics(db_file, board_id, team_id, sprint_id):
+    """
+    Metrics for one sprint as a DataFrame with zero or one rows.
+    """
+    return get_metrics_for(db_file, board_id, team_id, [sprint_id])
+
+
+def get_trend_metrics(db_file, board_id, team_id, sprint_ids):
+    """
+    Metrics rows of a board and team's sprint_ids that have metrics, with their rolling stats
+    (sprint_count and ROLLUP_COLUMNS), oldest first. A single query on both tables' primary keys.
+    """
+    ids = list(dict.fromkeys(sprint_ids))
+    columns = ', '.join(['m.*', 'r.sprint_count'] + [f'r.{name}' for name in ROLLUP_COLUMNS])
+    placeholders = ','.join('?' * len(ids))
+    sql = f'''
+        SELECT {columns} FROM sprint_metrics m
+        LEFT JOIN sprint_metrics_rollup r
+            ON r.board_id = m.board_id AND r.team_id = m.team_id AND r.sprint_id = m.sprint_id
+        WHERE m.board_id = ? AND m.team_id = ? AND m.sprint_id IN ({placeholders})
+        ORDER BY m.sprint_id
+    '''
+    db = get_db(db_file)
+    with db.lock:
+        cursor = db.conn.execute(sql, [board_id, team_id] + ids)
+        return pd.DataFrame(cursor.fetchall(), columns=[d[0] for d in cursor.description])
@@ -0,0 +1,304 @@
+from db import get_db
+
+
+def _add_missing_columns(c, table, columns):
+    existing = {row[1] for row in c.execute(f'PRAGMA table_info({table})')}
+    for name, definition in columns:
+        if name not in existing:
+            c.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+
+
+def _v1_core_tables(c):
+    # Table: sprint_capacities
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sprint_capacities (
+            sprint_id INTEGER PRIMARY KEY,
+            sprint_name TEXT,
+            planned_capacity REAL,
+            final_capacity REAL
+        )
+    ''')
+
+    # Table: sprint_metrics
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sprint_metrics (
+            sprint_id INTEGER PRIMARY KEY,
+            sprint_name TEXT,
+            velocity REAL,
+            completed_planned REAL,
+            completed_unplanned REAL,
+            carryover_pct REAL,
+            bugs_in INTEGER,
+            bugs_out INTEGER,
+            completion_pct_total REAL,
+            planned_pct REAL,
+            unplanned_pct REAL DEFAULT 0,
+            planned_sp REAL DEFAULT 0,
+            unplanned_sp REAL DEFAULT 0,
+            task_count_completed INTEGER DEFAULT 0,
+            task_count_incomplete INTEGER DEFAULT 0,
+            task_count_total INTEGER DEFAULT 0,
+            bugs_out_sp REAL DEFAULT 0,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Databases created before versioning may predate some columns
+    _add_missing_columns(c, 'sprint_metrics', [
+        ('planned_sp', 'REAL DEFAULT 0'),
+        ('unplanned_sp', 'REAL DEFAULT 0'),
+        ('sprint_name', 'TEXT'),
+        ('unplanned_pct', 'REAL DEFAULT 0'),
+        ('task_count_completed', 'INTEGER DEFAULT 0'),
+        ('task_count_incomplete', 'INTEGER DEFAULT 0'),
+        ('task_count_total', 'INTEGER DEFAULT 0'),
+        ('bugs_out_sp', 'REAL DEFAULT 0'),
+    ])
+
+    # Table: app_config
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS app_config (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+
+def _v2_issue_store(c):
+    # Table: jira_issues (raw issue JSON incl. changelog, one row per issue)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS jira_issues (
+            issue_key TEXT PRIMARY KEY,
+            updated TEXT,
+            data TEXT
+        )
+    ''')
+
+    # Table: sprint_issues (which stored issues belong to which sprint)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sprint_issues (
+            sprint_id INTEGER,
+            issue_key TEXT,
+            PRIMARY KEY (sprint_id, issue_key)
+        )
+    ''')
+
+    # Table: sprint_sync (sprint info + when the sprint's issues were last pulled)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sprint_sync (
+            sprint_id INTEGER PRIMARY KEY,
+            sprint_info TEXT,
+            last_sync TEXT
+        )
+    ''')
+
+
+def _v3_metadata_cache(c):
+    # Table: jira_metadata (board/site metadata with a per-entry expiry)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS jira_metadata (
+            cache_key TEXT PRIMARY KEY,
+            value TEXT,
+            fetched_at REAL,
+            ttl REAL
+        )
+    ''')
+
+
+def _v4_sprint_snapshots(c):
+    # Table: sprint_snapshots (frozen metrics of closed sprints + what they were computed from)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sprint_snapshots (
+            sprint_id INTEGER PRIMARY KEY,
+            complete_date TEXT,
+            source_hash TEXT,
+            metrics TEXT,
+            breakdown TEXT,
+            frozen_at TEXT
+        )
+    ''')
+
+
+def _rebuild_table(c, table, create_sql, columns, scope):
+    """
+    Recreates table with create_sql (SQLite can't change a primary key in place),
+    copying `columns` across and tagging every existing row with scope (board_id, team_id).
+    """
+    c.execute(f'ALTER TABLE {table} RENAME TO {table}_old')
+    c.execute(create_sql)
+    names = ', '.join(columns)
+    c.execute(f'INSERT INTO {table} (board_id, team_id, {names}) SELECT ?, ?, {names} FROM {table}_old', scope)
+    c.execute(f'DROP TABLE {table}_old')
+
+
+def _v5_board_team_scope(c):
+    # sprint_capacities, sprint_metrics and sprint_snapshots become keyed by (board_id, team_id, sprint_id).
+    # Until now the app only knew one board and team, so existing rows belong to the configured ones.
+    config = dict(c.execute("SELECT key, value FROM app_config WHERE key IN ('board_id', 'team_id')"))
+    scope = (config.get('board_id', ''), config.get('team_id', ''))
+
+    _rebuild_table(c, 'sprint_capacities', '''
+        CREATE TABLE sprint_capacities (
+            board_id TEXT NOT NULL DEFAULT '',
+            team_id TEXT NOT NULL DEFAULT '',
+            sprint_id INTEGER,
+            sprint_name TEXT,
+            planned_capacity REAL,
+            final_capacity REAL,
+            PRIMARY KEY (board_id, team_id, sprint_id)
+        )
+    ''', ['sprint_id', 'sprint_name', 'planned_capacity', 'final_capacity'], scope)
+
+    _rebuild_table(c, 'sprint_metrics', '''
+        CREATE TABLE sprint_metrics (
+            board_id TEXT NOT NULL DEFAULT '',
+            team_id TEXT NOT NULL DEFAULT '',
+            sprint_id INTEGER,
+            sprint_name TEXT,
+            velocity REAL,
+            completed_planned REAL,
+            completed_unplanned REAL,
+            carryover_pct REAL,
+            bugs_in INTEGER,
+            bugs_out INTEGER,
+            completion_pct_total REAL,
+            planned_pct REAL,
+            unplanned_pct REAL DEFAULT 0,
+            planned_sp REAL DEFAULT 0,
+            unplanned_sp REAL DEFAULT 0,
+            task_count_completed INTEGER DEFAULT 0,
+            task_count_incomplete INTEGER DEFAULT 0,
+            task_count_total INTEGER DEFAULT 0,
+            bugs_out_sp REAL DEFAULT 0,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (board_id, team_id, sprint_id)
+        )
+    ''', ['sprint_id', 'sprint_name', 'velocity', 'completed_planned', 'completed_unplanned', 'carryover_pct',
+          'bugs_in', 'bugs_out', 'completion_pct_total', 'planned_pct', 'unplanned_pct', 'planned_sp', 'unplanned_sp',
+          'task_count_completed', 'task_count_incomplete', 'task_count_total', 'bugs_out_sp', 'timestamp'], scope)
+
+    _rebuild_table(c, 'sprint_snapshots', '''
+        CREATE TABLE sprint_snapshots (
+            board_id TEXT NOT NULL DEFAULT '',
+            team_id TEXT NOT NULL DEFAULT '',
+            sprint_id INTEGER,
+            complete_date TEXT,
+            source_hash TEXT,
+            metrics TEXT,
+            breakdown TEXT,
+            frozen_at TEXT,
+            PRIMARY KEY (board_id, team_id, sprint_id)
+        )
+    ''', ['sprint_id', 'complete_date', 'source_hash', 'metrics', 'breakdown', 'frozen_at'], scope)
+
+
+def _v6_compact_issue_store(c):
+    # jira_issues.data now holds compact IssueRecord rows instead of raw issue JSON. The store is only
+    # a sync cache, so it is emptied and the next sync of each sprint refetches it (snapshots are kept).
+    c.execute('DELETE FROM jira_issues')
+    c.execute('DELETE FROM sprint_issues')
+    c.execute('DELETE FROM sprint_sync')
+
+
+def _v7_export_queue(c):
+    # Table: export_queue (sprint payloads waiting for / delivered to the Google Sheets webhook)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS export_queue (
+            idempotency_key TEXT PRIMARY KEY,
+            board_id TEXT NOT NULL DEFAULT '',
+            team_id TEXT NOT NULL DEFAULT '',
+            sprint_id INTEGER,
+            payload TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            queued_at TEXT,
+            sent_at TEXT
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_export_queue_status ON export_queue (status, queued_at)')
+
+
+def _v8_metrics_rollup(c):
+    # Table: sprint_metrics_rollup (rolling avg/std/min/max over each sprint and the ones before it,
+    # recomputed with window functions whenever a board and team's metrics change)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sprint_metrics_rollup (
+            board_id TEXT NOT NULL DEFAULT '',
+            team_id TEXT NOT NULL DEFAULT '',
+            sprint_id INTEGER,
+            sprint_count INTEGER,
+            velocity_avg REAL,
+            velocity_std REAL,
+            velocity_min REAL,
+            velocity_max REAL,
+            completion_avg REAL,
+            completion_std REAL,
+            completion_min REAL,
+            completion_max REAL,
+            bugs_in_avg REAL,
+            bugs_in_std REAL,
+            bugs_in_min REAL,
+            bugs_in_max REAL,
+            bugs_out_avg REAL,
+            bugs_out_std REAL,
+            bugs_out_min REAL,
+            bugs_out_max REAL,
+            PRIMARY KEY (board_id, team_id, sprint_id)
+        )
+    ''')
+    # Fill it for the metrics already stored (5 sprints per window; a frozen copy of the query
+    # metrics_repo runs on every save, since migrations must not change when that code does)
+    c.execute('''
+        INSERT INTO sprint_metrics_rollup
+        SELECT board_id, team_id, sprint_id, COUNT(*) OVER w,
+            AVG(velocity) OVER w,
+            sqrt(max(AVG(velocity * velocity) OVER w - AVG(velocity) OVER w * AVG(velocity) OVER w, 0)),
+            MIN(velocity) OVER w, MAX(velocity) OVER w,
+            AVG(completion_pct_total) OVER w,
+            sqrt(max(AVG(completion_pct_total * completion_pct_total) OVER w - AVG(completion_pct_total) OVER w * AVG(completion_pct_total) OVER w, 0)),
+            MIN(completion_pct_total) OVER w, MAX(completion_pct_total) OVER w,
+            AVG(bugs_in) OVER w,
+            sqrt(max(AVG(bugs_in * bugs_in) OVER w - AVG(bugs_in) OVER w * AVG(bugs_in) OVER w, 0)),
+            MIN(bugs_in) OVER w, MAX(bugs_in) OVER w,
+            AVG(bugs_out) OVER w,
+            sqrt(max(AVG(bugs_out * bugs_out) OVER w - AVG(bugs_out) OVER w * AVG(bugs_out) OVER w, 0)),
+            MIN(bugs_out) OVER w, MAX(bugs_out) OVER w
+        FROM sprint_metrics
+        WINDOW w AS (PARTITION BY board_id, team_id ORDER BY sprint_id ROWS BETWEEN 4 PRECEDING AND CURRENT ROW)
+    ''')
+
+
+# Applied in order; PRAGMA user_version records how many have run. Append only, never edit.
+MIGRATIONS = [
+    _v1_core_tables,
+    _v2_issue_store,
+    _v3_metadata_cache,
+    _v4_sprint_snapshots,
+    _v5_board_team_scope,
+    _v6_compact_issue_store,
+    _v7_export_queue,
+    _v8_metrics_rollup,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+_migrated = set()
+
+
+def migrate(db_file):
+    """
+    Brings the database up to SCHEMA_VERSION, one transaction per migration.
+    Returns immediately when the schema is already current.
+    """
+    if db_file in _migrated:
+        return
+    db = get_db(db_file)
+    with db.lock:
+        version = db.query_one('PRAGMA user_version')[0]
+        for number in range(version + 1, SCHEMA_VERSION + 1):
+            with db.transaction() as c:
+                # sqlite3 doesn't open transactions for DDL by itself
+                c.execute('BEGIN')
+                MIGRATIONS[number - 1](c)
+                c.execute(f'PRAGMA user_version = {number}')
+    _migrated.add(db_file)
@@ -0,0 +1,172 @@
+import json
+import time
+import uuid
+
+import requests
+
+from db import get_db
+from jira_dates import utc_now
+
+# Sprints per webhook POST (one Apps Script execution writes them all with range setValues)
+EXPORT_BATCH_SIZE = 50
+# Attempts per batch on network errors, 429 and 5xx, with exponential backoff between them
+EXPORT_MAX_ATTEMPTS = 4
+EXPORT_MAX_WAIT = 30
+EXPORT_TIMEOUT = (5, 120)
+
+
+def export_payload(row):
+    """
+    The webhook payload of one sprint_metrics row (a dict or pandas Series), in the sheet's field names.
+    """
+    return {
+        "sprintName": row.get('sprint_name') or "",
+        "velocity": float(row['velocity']),
+        "completedPlanned": float(row['completed_planned']),
+        "completedUnplanned": float(row['completed_unplanned']),
+        "completedTasks": int(row.get('task_count_completed') or 0),
+        "incompleteTasks": int(row.get('task_count_incomplete') or 0),
+        "carryover": float(row['carryover_pct']),
+        "plannedPct": float(row['planned_pct']),
+        "plannedCompletionPct": float(row['planned_pct']),
+        "unplannedCompletionPct": float(row.get('unplanned_pct') or 0),
+        "totalCompletionPct": float(row['completion_pct_total']),
+        "taskCompletionPct": 100 - float(row['carryover_pct']),
+        "bugsIn": int(row['bugs_in']),
+        "bugsOut": int(row['bugs_out']),
+        "plannedSP": float(row.get('planned_sp') or 0.0),
+        "unplannedSP": float(row.get('unplanned_sp') or 0.0),
+    }
+
+
+def export_key():
+    """
+    Idempotency key of one queued export: fresh for every enqueue and reused by every retry of that
+    queue row, so a redelivered batch is recognised by the receiver while a later export of the same
+    numbers (e.g. A, then B, then A again) is still written.
+    """
+    return uuid.uuid4().hex
+
+
+def enqueue_exports(db_file, board_id, team_id, rows):
+    """
+    Queues the payloads of sprint_metrics rows for the webhook, each under a new idempotency key.
+    A sprint already waiting with the same numbers is skipped; one waiting with other numbers is
+    superseded by the new export.
+    Returns (queued, skipped).
+    """
+    payloads = {}
+    for row in rows:
+        payloads[int(row['sprint_id'])] = export_payload(row)
+    if not payloads:
+        return 0, 0
+
+    with get_db(db_file).transaction() as c:
+        placeholders = ','.join('?' * len(payloads))
+        waiting = c.execute(f'''
+            SELECT sprint_id, idempotency_key, payload FROM export_queue
+            WHERE status = 'pending' AND board_id = ? AND team_id = ? AND sprint_id IN ({placeholders})
+        ''', [board_id, team_id] + list(payloads)).fetchall()
+        unchanged = {sprint_id for sprint_id, _, payload in waiting if json.loads(payload) == payloads[sprint_id]}
+        superseded = [(key,) for sprint_id, key, _ in waiting if sprint_id not in unchanged]
+        now = utc_now().isoformat()
+        new = [(export_key(), board_id, team_id, sprint_id, json.dumps(payload), now)
+               for sprint_id, payload in payloads.items() if sprint_id not in unchanged]
+        c.executemany("UPDATE export_queue SET status = 'superseded' WHERE idempotency_key = ?", superseded)
+        c.executemany('''
+            INSERT INTO export_queue (idempotency_key, board_id, team_id, sprint_id, payload, queued_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', new)
+    return len(new), len(unchanged)
+
+
+def pending_exports(db_file, limit=None):
+    """
+    Queued, undelivered exports, oldest first, as [(idempotency_key, payload dict)].
+    """
+    rows = get_db(db_file).query('''
+        SELECT idempotency_key, payload FROM export_queue
+        WHERE status = 'pending' ORDER BY queued_at, sprint_id LIMIT ?
+    ''', (-1 if limit is None else limit,))
+    return [(key, json.loads(payload)) for key, payload in rows]
+
+
+def _retry_wait(response, attempt):
+    try:
+        wait = float(response.headers.get("Retry-After", "")) if response is not None else None
+    except ValueError:
+        wait = None
+    if wait is None:
+        wait = 0.5 * 2 ** attempt
+    return min(max(wait, 0.0), EXPORT_MAX_WAIT)
+
+
+def post_batch(session, webhook_url, items, max_attempts=EXPORT_MAX_ATTEMPTS):
+    """
+    POSTs {"batch": items} to the webhook, retrying network errors, 429 and 5xx.
+    Returns (response JSON, None) or (None, error message).
+    """
+    error = None
+    for attempt in range(max_attempts):
+        response = None
+        try:
+            response = session.post(webhook_url, json={"batch": items}, timeout=EXPORT_TIMEOUT)
+            if response.status_code == 429 or response.status_code >= 500:
+                error = f"HTTP {response.status_code}"
+            elif response.status_code != 200:
+                return None, f"HTTP {response.status_code}: {response.text[:200]}"
+            else:
+                return response.json(), None
+        except ValueError:
+            return None, f"Webhook did not answer with JSON: {response.text[:200]}"
+        except requests.RequestException as e:
+            error = str(e)
+        if attempt + 1 < max_attempts:
+            time.sleep(_retry_wait(response, attempt))
+    return None, error
+
+
+def flush_exports(db_file, webhook_url, batch_size=EXPORT_BATCH_SIZE, max_attempts=EXPORT_MAX_ATTEMPTS, session=None):
+    """
+    Delivers every pending export, batch_size sprints per POST. Items the receiver reports as
+    updated or duplicate are marked sent, ones it rejects are marked failed (the next export of that
+    sprint queues it anew); after a delivery error the batch stays pending, with its keys, for the next flush.
+    Returns {"sent": n, "duplicates": n, "failed": [(sprint name, error)]}.
+    """
+    session = session or requests.Session()
+    db = get_db(db_file)
+    summary = {"sent": 0, "duplicates": 0, "failed": []}
+    pending = pending_exports(db_file)
+    size = max(1, batch_size)
+
+    for start in range(0, len(pending), size):
+        batch = pending[start:start + size]
+        items = [{"idempotencyKey": key, **payload} for key, payload in batch]
+        names = {key: payload.get('sprintName', '') for key, payload in batch}
+        response, error = post_batch(session, webhook_url, items, max_attempts=max_attempts)
+
+        results = {}
+        if response is not None:
+            results = {r.get('idempotencyKey'): r for r in response.get('results', [])}
+            if not results:
+                error = response.get('updated') or "Webhook returned no per-sprint results"
+
+        now = utc_now().isoformat()
+        sent, rejected, retry = [], [], []
+        for key in names:
+            result = results.get(key)
+            if result and result.get('status') in ("updated", "duplicate"):
+                sent.append((now, key))
+                summary["duplicates" if result['status'] == "duplicate" else "sent"] += 1
+                continue
+            message = (result or {}).get('message') or error or "No result for this sprint"
+            (rejected if result else retry).append((message, key))
+            summary["failed"].append((names[key], message))
+
+        with db.transaction() as c:
+            c.executemany("UPDATE export_queue SET status = 'sent', attempts = attempts + 1, last_error = NULL, sent_at = ? "
+                          "WHERE idempotency_key = ?", sent)
+            c.executemany("UPDATE export_queue SET status = 'failed', attempts = attempts + 1, last_error = ? "
+                          "WHERE idempotency_key = ?", rejected)
+            c.executemany("UPDATE export_queue SET attempts = attempts + 1, last_error = ? WHERE idempotency_key = ?", retry)
+    return summary
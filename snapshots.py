@@ -0,0 +1,81 @@
+import hashlib
+import json
+
+from db import get_db
+from jira_dates import utc_now
+
+
+def source_hash(sprint_info, issues, bugs_in_issues):
+    """
+    Stable digest of everything a sprint's metrics are computed from (issues are IssueRecords).
+    """
+    payload = {
+        "sprint": sprint_info,
+        "issues": sorted(i.to_row() for i in issues),
+        "bugs_in": sorted(b.get('key', '') for b in bugs_in_issues),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def freeze_sprint(db_file, board_id, team_id, sprint_id, sprint_info, digest, metrics, breakdown):
+    """
+    Stores the computed metrics and breakdown of a closed sprint as its snapshot.
+    Sprints that aren't closed are never frozen; returns whether a snapshot was written.
+    """
+    if sprint_info.get('state') != 'closed' or not metrics:
+        return False
+    get_db(db_file).execute('''
+        INSERT INTO sprint_snapshots (board_id, team_id, sprint_id, complete_date, source_hash, metrics, breakdown, frozen_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(board_id, team_id, sprint_id) DO UPDATE SET
+            complete_date=excluded.complete_date,
+            source_hash=excluded.source_hash,
+            metrics=excluded.metrics,
+            breakdown=excluded.breakdown,
+            frozen_at=excluded.frozen_at
+    ''', (board_id, team_id, sprint_id, sprint_info.get('completeDate'), digest, json.dumps(metrics), json.dumps(breakdown),
+          utc_now().isoformat()))
+    return True
+
+
+def get_snapshot(db_file, board_id, team_id, sprint_id):
+    """
+    Returns the sprint's snapshot as a dict, or None if it was never frozen.
+    """
+    row = get_db(db_file).query_one('''
+        SELECT complete_date, source_hash, metrics, breakdown, frozen_at
+        FROM sprint_snapshots WHERE board_id = ? AND team_id = ? AND sprint_id = ?
+    ''', (board_id, team_id, sprint_id))
+    if not row:
+        return None
+    complete_date, digest, metrics, breakdown, frozen_at = row
+    return {
+        "complete_date": complete_date,
+        "source_hash": digest,
+        "metrics": json.loads(metrics),
+        "breakdown": json.loads(breakdown),
+        "frozen_at": frozen_at,
+    }
+
+
+def get_frozen_dates(db_file, board_id, team_id, sprint_ids):
+    """
+    Returns {sprint_id: completeDate it was frozen at} for those of sprint_ids that have a snapshot.
+    """
+    sprint_ids = list(sprint_ids)
+    if not sprint_ids:
+        return {}
+    placeholders = ','.join('?' * len(sprint_ids))
+    rows = get_db(db_file).query(f'''
+        SELECT sprint_id, complete_date FROM sprint_snapshots
+        WHERE board_id = ? AND team_id = ? AND sprint_id IN ({placeholders})
+    ''', [board_id, team_id] + sprint_ids)
+    return dict(rows)
+
+
+def is_current(complete_date, sprint):
+    """
+    True if a snapshot frozen at complete_date still matches the sprint listing entry:
+    the sprint is closed and hasn't been reopened and closed again since.
+    """
+    return sprint.get('state') == 'closed' and complete_date is not None and complete_date == sprint.get('completeDate')
@@ -0,0 +1,826 @@
+import base64
+import hashlib
+from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from db import get_db
+from migrations import migrate
+from jira_client import get_client
+from jira_json import decode, decode_issue_page
+from async_fetch import fetch_sprints_concurrently
+from jira_dates import parse_jira_datetime, utc_now
+from metrics_engine import flatten_sprint, compute_stats, completion_pct
+from metadata_cache import cache_lookup, cache_put, SPRINT_LIST_TTL, BOARD_CONFIG_TTL, FIELDS_TTL, USER_TTL
+from issue_records import IssueRecord
+from issue_store import get_sprint_sync, merge_sprint_issues, load_sprint_issues
+from metrics_repo import save_metrics_rows, refresh_rollups, invalidate_metrics, get_metrics_for, get_trend_metrics
+from diagnostics import timed
+from snapshots import source_hash, freeze_sprint, get_snapshot, get_frozen_dates, is_current
+
+# --- Database Setup ---
+DB_FILE = "sprint_stats.db"
+
+# Concurrent Jira calls for trend loading (also sizes the HTTP connection pool)
+MAX_WORKERS = 8
+
+# JQL dates are read in the Jira user's timezone, so incremental syncs look back
+# a full day past the last sync to cover any UTC offset. Re-fetched issues just overwrite.
+SYNC_OVERLAP = timedelta(days=1)
+
+# Issue pages fetched in parallel per listing (bounds peak memory of a large sprint)
+MAX_PAGES_IN_FLIGHT = 4
+
+# Sprint custom field and the only changelog fields the metrics replay (IssueRecord keeps just these)
+SPRINT_FIELD_ID = "customfield_10020"
+CHANGELOG_FIELD_IDS = ["status", SPRINT_FIELD_ID]
+
+# Fixed Story Points field
+SP_FIELD_ID = "customfield_10033"
+
+# Bugs count as "Bugs In" when moved to this status in the sprint's window; search page size for them
+BUGS_IN_STATUS = "Triaged"
+BUGS_IN_PAGE_SIZE = 1000
+
+# Issues per bulk changelog request (Jira allows up to 1000; smaller batches page in parallel)
+CHANGELOG_BATCH_SIZE = 100
+
+# Sprints in the trend charts (the selected one and those before it), by default and at most (the sprint fetch limit)
+TREND_WINDOW = 5
+MAX_TREND_WINDOW = 200
+
+def init_db():
+    # Versioned via PRAGMA user_version; a no-op once the schema is current
+    migrate(DB_FILE)
+
+def save_config(key, value):
+    get_db(DB_FILE).execute('INSERT INTO app_config (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value', (key, str(value)))
+
+def get_config(key, default=None):
+    row = get_db(DB_FILE).query_one('SELECT value FROM app_config WHERE key = ?', (key,))
+    return row[0] if row else default
+
+# Per-sprint rows (capacities, metrics, snapshots) are scoped by board and team:
+# a sprint can show up on several boards, and Bugs In depends on the team.
+SCOPE_FILTER = 'board_id = ? AND team_id = ? AND sprint_id = ?'
+
+def delete_sprint_data(board_id, team_id, sprint_id):
+    db = get_db(DB_FILE)
+    key = (board_id, team_id, sprint_id)
+    with db.lock:
+        with db.transaction() as c:
+            c.execute(f'DELETE FROM sprint_metrics WHERE {SCOPE_FILTER}', key)
+            c.execute(f'DELETE FROM sprint_capacities WHERE {SCOPE_FILTER}', key)
+            c.execute(f'DELETE FROM sprint_snapshots WHERE {SCOPE_FILTER}', key)
+            refresh_rollups(c, [(board_id, team_id)])
+        invalidate_metrics(DB_FILE, [key])
+
+def save_capacity(board_id, team_id, sprint_id, sprint_name, planned, final):
+    get_db(DB_FILE).execute('''
+        INSERT INTO sprint_capacities (board_id, team_id, sprint_id, sprint_name, planned_capacity, final_capacity)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(board_id, team_id, sprint_id) DO UPDATE SET
+            sprint_name=excluded.sprint_name,
+            planned_capacity=excluded.planned_capacity,
+            final_capacity=excluded.final_capacity
+    ''', (board_id, team_id, sprint_id, sprint_name, planned, final))
+
+def get_capacity(board_id, team_id, sprint_id):
+    row = get_db(DB_FILE).query_one(f'SELECT planned_capacity, final_capacity FROM sprint_capacities WHERE {SCOPE_FILTER}',
+                                    (board_id, team_id, sprint_id))
+    return row if row else (0.0, 0.0)
+
+def metrics_row(board_id, team_id, sprint_id, sprint_name, metrics):
+    return (
+        board_id,
+        team_id,
+        sprint_id,
+        sprint_name,
+        metrics['velocity'], 
+        metrics['completed_planned'], 
+        metrics['completed_unplanned'],
+        metrics['carryover_pct'], 
+        metrics['bugs_in'], 
+        metrics['bugs_out'],
+        metrics['completion_pct_total'], 
+        metrics['planned_pct'],
+        metrics.get('planned_sp', 0),
+        metrics.get('unplanned_sp', 0),
+        metrics.get('unplanned_pct', 0.0),
+        metrics.get('task_count_completed', 0),
+        metrics.get('task_count_incomplete', 0),
+        metrics.get('task_count_total', 0),
+        metrics.get('bugs_out_sp', 0.0)
+    )
+
+def save_metrics_many(board_id, team_id, entries):
+    """
+    Upserts many (sprint_id, sprint_name, metrics) entries of a board and team in one transaction.
+    """
+    save_metrics_rows(DB_FILE, [metrics_row(board_id, team_id, sprint_id, sprint_name, metrics)
+                                for sprint_id, sprint_name, metrics in entries])
+
+def save_metrics(board_id, team_id, sprint_id, sprint_name, metrics):
+    save_metrics_many(board_id, team_id, [(sprint_id, sprint_name, metrics)])
+
+# --- Jira API Functions ---
+def get_auth_header(email, token):
+    creds = f"{email}:{token}"
+    encoded = base64.b64encode(creds.encode("utf-8")).decode("utf-8")
+    return {"Authorization": f"Basic {encoded}", "Content-Type": "application/json"}
+
+def fetch_sprint_range(client, url, start_at, limit=None):
+    """
+    Pages the board's sprint listing from start_at (oldest first), up to limit sprints.
+    Returns (sprints, total).
+    """
+    sprints = []
+    total = None
+    while limit is None or len(sprints) < limit:
+        # Request in chunks
+        fetch_count = 50 if limit is None else min(50, limit - len(sprints))
+        params = {"state": "active,closed,future", "maxResults": fetch_count, "startAt": start_at}
+        r = client.get(url, params=params)
+        r.raise_for_status()
+        data = r.json()
+        total = data.get('total', total)
+        values = data.get('values', [])
+        if not values:
+            break
+        sprints.extend(values)
+        start_at += len(values)
+        if data.get('isLast') or (total is not None and start_at >= total):
+            break
+    return sprints, (total if total is not None else start_at)
+
+def get_sprints(domain, board_id, auth_header, limit=20):
+    """
+    Latest `limit` sprints of the board, most recent first.
+    The listing is cached with its board positions; once the TTL expires only the sprints from the
+    first non-closed one onwards are re-fetched, since closed sprints don't change.
+    """
+    client = get_client(domain, auth_header, max_workers=MAX_WORKERS)
+    url = f"/rest/agile/1.0/board/{board_id}/sprint"
+    cache_key = f"{domain}:board:{board_id}:sprints"
+    cached, fresh = cache_lookup(DB_FILE, cache_key)
+
+    try:
+        if cached is None:
+            # 1. First fetch to get the 'total' count
+            r = client.get(url, params={"state": "active,closed,future", "maxResults": 1})
+            r.raise_for_status()
+            total = r.json().get('total', 0)
+            if total == 0:
+                return []
+
+            # 2. Calculate startAt to get the LATEST sprints
+            # If total=100 and limit=20, we want to start at 80
+            start = max(0, total - limit)
+            ordered, total = fetch_sprint_range(client, url, start, limit)
+            changed = True
+        else:
+            start, total, ordered = cached['start'], cached['total'], cached['sprints']
+            changed = not fresh
+            if not fresh:
+                # Re-fetch from the first sprint that could still change (active/future) or new ones
+                open_idx = next((i for i, s in enumerate(ordered) if s.get('state') != 'closed'), len(ordered))
+                newer, total = fetch_sprint_range(client, url, start + open_idx)
+                ordered = ordered[:open_idx] + newer
+            wanted_start = max(0, total - limit)
+            if wanted_start < start:
+                # Limit was raised: pull the older sprints we never cached
+                older, _ = fetch_sprint_range(client, url, wanted_start, start - wanted_start)
+                ordered = older + ordered
+                start = wanted_start
+                changed = True
+        if changed:
+            cache_put(DB_FILE, cache_key, {"start": start, "total": total, "sprints": ordered}, SPRINT_LIST_TTL)
+    except Exception as e:
+        print(f"Error fetching sprints: {e}")
+        if cached is None:
+            return []
+        ordered = cached['sprints']
+
+    sprints = ordered[-limit:]
+    # Sort by ID descending (most recent first)
+    sprints = sorted(sprints, key=lambda x: x['id'], reverse=True)
+    return sprints
+
+def get_team_members(domain, team_id, auth_header):
+    # This is a bit tricky. The user mentioned Team ID.
+    # We might need to use the generic user search or a specific teams API.
+    # Assuming standard Jira Cloud logic, sometimes 'teams' is handled differently.
+    # However, 'assignee' usually just needs accountId. 
+    # If the user provided a Team ID, we should try to fetch members of that team to filter 'Bugs In'.
+    # Note: access to team members via API usually requires specific permissions/APIs (like teams-api.atlassian.com).
+    # Since we need to keep it simple and within standard Jira auth if possible, let's try a direct approach.
+    # If standard Jira API doesn't easily expose team members without 3rd party plugins (like Tempo/Portfolio),
+    # we might strictly rely on the users being part of the 'assignee' field in the fetched issues.
+    # BUT, prompt says "Fetch team members using the Atlassian Teams API".
+    
+    # We will try the Teams API generic endpoint.
+    # This endpoint often requires a different base URL: https://api.atlassian.com/teams/v1/org/{orgId}/teams/{teamId}/members
+    # But usually "Domain" is like "mycompany.atlassian.net".
+    # Let's try to infer or ask. For now, we'll try to use the issues to infer team, or assume all assignees in the board are relevant if this fails.
+    # Actually, let's look for a cleaner way: The prompt explicitly says fetch members.
+    # Let's try a common known endpoint for Teams in Jira Cloud if available, or skip with a warning if exact endpoint is obscure.
+    # Better approach given the constraints: We can't easily guess the 'Org ID' for the Teams API.
+    # However, we can use the /rest/api/3/user/search?query=... if we had names.
+    # Let's stick to identifying team members from the issues themselves if we can't hit the API, 
+    # OR we just implement a placeholder for this specific team filter if API fails.
+    
+    # Update: The prompt gave a specific UUID for Team ID.
+    # Let's try https://api.atlassian.com/ex/jira/{cloudId}/... wait, standard Jira API is on the domain.
+    # We'll try to fetch all assignees from the sprint issues and assume they must be filtered by the "Team" field if it exists on the issue,
+    # OR we just trust the prompt's request for "Atlassian Teams API".
+    # Since I don't have the full context of their Atlassian setup (Org ID etc), I will implement a robust fallback:
+    # We will just fetch the 'Bugs In' regardless of assignee first (marked as warning), or try to filter if I can.
+    # Actually, a common pattern for "Team" in Jira is a custom field.
+    # Let's simplify: We will filter Bugs In by *Assignee* being in the list of people who worked on *other things* in the sprint?
+    # No, prompt says: "Fetch team members ... or filter by 'assignee' if needed".
+    # Let's allow the user to input a comma-separated list of Account IDs or Emails if the API fails?
+    # No, automation is key.
+    # Let's try to just check if the assignee was active in the sprint?
+    # Let's assume for this code that we check if the assignee is present in the list of assignees for the *sprint's issues*.
+    # That might be a safe "Team" proxy.
+    pass
+
+def fetch_issue_pages(client, url, params, executor, convert=None):
+    """
+    Fetches every page of an issue listing. The first page reveals 'total'; the remaining
+    startAt offsets are then fetched in parallel, at most MAX_PAGES_IN_FLIGHT at a time,
+    and reassembled in order.
+    With convert, each issue is passed through convert(issue) as soon as it is parsed
+    (pages are streamed when ijson is installed), so only the converted issues outlive the raw page.
+    """
+    def fetch_page(start_at):
+        r = client.get(url, params={**params, "startAt": start_at}, stream=True)
+        try:
+            r.raise_for_status()
+            with timed("fetch.decode"):
+                page, issues = decode_issue_page(r, convert)
+        finally:
+            r.close()
+        return page.get('total', 0), issues
+
+    total, issues = fetch_page(0)
+    # Jira may serve fewer than maxResults per page; the first page tells us the real size
+    page_size = len(issues)
+    if not page_size or page_size >= total:
+        return issues
+
+    pending = deque()
+    for start_at in range(page_size, total, page_size):
+        pending.append(executor.submit(fetch_page, start_at))
+        if len(pending) >= MAX_PAGES_IN_FLIGHT:
+            issues.extend(pending.popleft().result()[1])
+    while pending:
+        issues.extend(pending.popleft().result()[1])
+    return issues
+
+def get_sprint_issues(domain, sprint_id, auth_header, sp_field_id, jql=None):
+    """
+    Returns (sprint_info, IssueRecords) for a sprint, with complete status/Sprint histories.
+    """
+    client = get_client(domain, auth_header, max_workers=MAX_WORKERS)
+    url = f"/rest/agile/1.0/sprint/{sprint_id}/issue"
+    # Only what IssueRecord keeps (the changelog comes from expand)
+    fields_to_fetch = [
+        "status", "issuetype", "created", "resolutiondate", "updated", sp_field_id, "issuekey",
+    ]
+    fields_param = ",".join(fields_to_fetch)
+
+    # Fetch ALL issues, filter sub-tasks in python
+    params = {
+        # "jql": "issuekey is not EMPTY", # Optional, usually implied
+        "fields": fields_param,
+        "expand": "changelog",
+        "maxResults": 1000
+    }
+    if jql:
+        params["jql"] = jql
+    
+    sprint_info_url = f"/rest/agile/1.0/sprint/{sprint_id}"
+
+    # Sprint info runs alongside the issue pages on the same small pool
+    with ThreadPoolExecutor(max_workers=MAX_PAGES_IN_FLIGHT + 1) as executor:
+        sprint_info_future = executor.submit(lambda: client.get(sprint_info_url).json())
+        issues = fetch_issue_pages(client, url, params, executor,
+                                   convert=lambda issue: IssueRecord.from_issue(issue, sp_field_id))
+        sprint_info = sprint_info_future.result()
+
+    with timed("sync.changelogs", sprint_id=sprint_id):
+        complete_changelogs(domain, auth_header, issues)
+    return sprint_info, issues
+
+def is_changelog_truncated(issue):
+    changelog = issue.get('changelog')
+    if not changelog:
+        return False
+    return changelog.get('total', 0) > len(changelog.get('histories', []))
+
+def fetch_changelogs_bulk(client, issue_ids):
+    """
+    Pulls complete status/Sprint histories for a batch of issues through the bulk changelog endpoint.
+    Returns {issue_id: [histories]}.
+    """
+    histories_by_id = {}
+    body = {
+        "issueIdsOrKeys": issue_ids,
+        "fieldIds": CHANGELOG_FIELD_IDS,
+        "maxResults": 1000,
+    }
+    while True:
+        r = client.post("/rest/api/3/changelog/bulkfetch", json=body)
+        r.raise_for_status()
+        data = decode(r)
+        for log in data.get('issueChangeLogs', []):
+            histories_by_id.setdefault(str(log['issueId']), []).extend(log.get('changeHistories', []))
+        token = data.get('nextPageToken')
+        if not token:
+            break
+        body = {**body, "nextPageToken": token}
+    return histories_by_id
+
+def fetch_changelogs_batched(client, issue_ids):
+    """
+    fetch_changelogs_bulk over any number of issues, in parallel batches of CHANGELOG_BATCH_SIZE
+    (the endpoint caps the issues per request).
+    Returns ({issue_id: [histories]}, errors), errors holding one exception per failed batch.
+    """
+    batches = [issue_ids[n:n + CHANGELOG_BATCH_SIZE] for n in range(0, len(issue_ids), CHANGELOG_BATCH_SIZE)]
+    histories_by_id = {}
+    errors = []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [executor.submit(fetch_changelogs_bulk, client, batch) for batch in batches]
+        for future in as_completed(futures):
+            try:
+                histories_by_id.update(future.result())
+            except Exception as e:
+                errors.append(e)
+    return histories_by_id, errors
+
+def complete_changelogs(domain, auth_header, issues):
+    """
+    Replaces the events of IssueRecords whose inline changelog was truncated (expand=changelog stops
+    at 100 histories) with their full status/Sprint history. Mutates the records.
+    """
+    truncated = [i for i in issues if i.changelog_truncated]
+    if truncated:
+        client = get_client(domain, auth_header, max_workers=MAX_WORKERS)
+        full_histories, errors = fetch_changelogs_batched(client, [i.id for i in truncated])
+        for e in errors:
+            # Keep the partial inline history for this batch rather than failing the sprint
+            print(f"Error fetching bulk changelogs: {e}")
+        for issue in truncated:
+            histories = full_histories.get(issue.id)
+            if histories is not None:
+                issue.set_histories(histories)
+
+def get_sprint_issue_keys(domain, sprint_id, auth_header):
+    """
+    Lists the keys of every issue currently in the sprint (no fields, no changelog).
+    """
+    client = get_client(domain, auth_header, max_workers=MAX_WORKERS)
+    url = f"/rest/agile/1.0/sprint/{sprint_id}/issue"
+    with ThreadPoolExecutor(max_workers=MAX_PAGES_IN_FLIGHT) as executor:
+        issues = fetch_issue_pages(client, url, {"fields": "key", "maxResults": 1000}, executor)
+    return [i['key'] for i in issues]
+
+def sync_sprint_issues(domain, sprint_id, auth_header, sp_field_id, full=False):
+    """
+    Brings the local issue store up to date for a sprint and returns (sprint_info, issues) from it.
+    First sync pulls everything; later syncs only pull issues with updated >= last sync.
+    """
+    synced_at = utc_now()
+    previous = None if full else get_sprint_sync(DB_FILE, sprint_id)
+
+    with timed("sync.fetch", sprint_id=sprint_id, full=previous is None):
+        if previous is None:
+            sprint_info, issues = get_sprint_issues(domain, sprint_id, auth_header, sp_field_id)
+            member_keys = [i.key for i in issues]
+        else:
+            previous_info, last_sync = previous
+            since = (last_sync - SYNC_OVERLAP).strftime("%Y-%m-%d %H:%M")
+            sprint_info, issues = get_sprint_issues(domain, sprint_id, auth_header, sp_field_id, jql=f'updated >= "{since}"')
+            # Active sprints can gain or lose issues without them changing, so membership is reconciled
+            # on every sync up to and including the one that first sees the sprint closed; after that it is fixed
+            member_keys = None if previous_info.get('state') == 'closed' else get_sprint_issue_keys(domain, sprint_id, auth_header)
+
+    with timed("sync.store", sprint_id=sprint_id):
+        merge_sprint_issues(DB_FILE, sprint_id, sprint_info, issues, synced_at, member_keys)
+    with timed("sync.load", sprint_id=sprint_id):
+        return load_sprint_issues(DB_FILE, sprint_id)
+
+def bugs_in_window(sprint_end_iso):
+    """
+    (first day, last day) of a sprint's Bugs In window as YYYY-MM-DD, both inclusive.
+    Window: Tuesday (planning day, sprint_end - 13 days) to Monday (day before close, sprint_end - 1 day)
+    """
+    # Parse sprint end (always UTC-aware, including the active-sprint fallback)
+    end_dt = parse_jira_datetime(sprint_end_iso) or utc_now()
+    window_end = (end_dt - timedelta(days=1)).strftime("%Y-%m-%d")   # Monday before close
+    window_start = (end_dt - timedelta(days=13)).strftime("%Y-%m-%d") # Tuesday (planning)
+    return window_start, window_end
+
+def get_user_timezone(domain, auth_header):
+    """
+    The Jira user's timezone (JQL dates, e.g. DURING, are read in it) as a ZoneInfo, cached per user.
+    Returns None if it can't be fetched and was never cached.
+    """
+    user = hashlib.sha256(auth_header.get("Authorization", "").encode("utf-8")).hexdigest()[:16]
+    cache_key = f"{domain}:myself:{user}:timezone"
+    cached, fresh = cache_lookup(DB_FILE, cache_key)
+    name = cached
+    if not fresh:
+        client = get_client(domain, auth_header, max_workers=MAX_WORKERS)
+        try:
+            r = client.get("/rest/api/3/myself")
+            r.raise_for_status()
+            name = r.json().get('timeZone') or "UTC"
+            cache_put(DB_FILE, cache_key, name, USER_TTL)
+        except Exception as e:
+            print(f"Error fetching user timezone: {e}")
+    if name is None:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        print(f"Unknown Jira timezone {name!r}, using UTC")
+        return ZoneInfo("UTC")
+
+def triaged_dates(issue, tz):
+    """
+    Days (YYYY-MM-DD, in timezone tz) on which a bug's changelog moved it to Triaged.
+    """
+    days = set()
+    for h in (issue.get('changelog') or {}).get('histories', []):
+        if any(item.get('field') == 'status' and item.get('toString') == BUGS_IN_STATUS for item in h.get('items', [])):
+            created = parse_jira_datetime(h.get('created'))
+            if created:
+                days.add(created.astimezone(tz).strftime("%Y-%m-%d"))
+    return days
+
+def search_triaged_bugs(domain, team_id, auth_header, window_start, window_end, tz):
+    """
+    Every bug of the team moved to Triaged between window_start and window_end (inclusive days),
+    as {key: set of triaged days in tz}. One JQL search with only keys and changelogs, following
+    nextPageToken to the end; changelogs Jira truncated are completed through the bulk endpoint.
+    Returns None if the search or completing a changelog fails.
+    """
+    # Use "Team[Team]" syntax as per working Slack integration
+    jql = f'type = Bug AND "Team[Team]" = "{team_id}" AND status CHANGED TO "{BUGS_IN_STATUS}" DURING ("{window_start}", "{window_end}")'
+
+    # Use NEW API endpoint (old /search deprecated as of 2024)
+    client = get_client(domain, auth_header, max_workers=MAX_WORKERS)
+    url = "/rest/api/3/search/jql"
+    params = {"jql": jql, "fields": "key", "expand": "changelog", "maxResults": BUGS_IN_PAGE_SIZE}
+
+    bugs = []
+    while True:
+        r = client.get(url, params=params)
+        if r.status_code != 200:
+            print(f"Bugs In JQL failed ({r.status_code}): {jql}")
+            try:
+                print(f"Error details: {r.json().get('errorMessages', [])}")
+            except ValueError:
+                pass
+            return None
+        data = decode(r)
+        bugs.extend(data.get('issues', []))
+        token = data.get('nextPageToken')
+        if not token or data.get('isLast'):
+            break
+        params = {**params, "nextPageToken": token}
+
+    truncated = [b for b in bugs if is_changelog_truncated(b)]
+    if truncated:
+        full, errors = fetch_changelogs_batched(client, [str(b['id']) for b in truncated])
+        if errors:
+            # A Triaged transition may be in the missing history, so the count can't be trusted
+            print(f"Error fetching Bugs In changelogs: {errors[0]}")
+            return None
+        for bug in truncated:
+            if str(bug['id']) in full:
+                bug['changelog'] = {'histories': full[str(bug['id'])]}
+    return {b['key']: triaged_dates(b, tz) for b in bugs}
+
+def get_bugs_in_for_sprints(domain, sprints, team_id, auth_header):
+    """
+    Bugs In for many sprint listing entries with a single search over the span of all their windows;
+    each bug is then counted in every sprint whose window holds one of its Triaged transitions.
+    Transitions are bucketed by day in the Jira user's timezone, as Jira evaluates the window
+    of a per-sprint CHANGED TO ... DURING query.
+    Returns {sprint_id: [{"key": ...}, ...]}, or None if the search (or the timezone lookup) failed.
+    """
+    windows = {s['id']: bugs_in_window(s.get('completeDate')) for s in sprints}
+    if not windows:
+        return {}
+    tz = get_user_timezone(domain, auth_header)
+    if tz is None:
+        return None
+    triaged = search_triaged_bugs(domain, team_id, auth_header,
+                                  min(w[0] for w in windows.values()), max(w[1] for w in windows.values()), tz)
+    if triaged is None:
+        return None
+    bugs_in = {}
+    for sprint_id, (window_start, window_end) in windows.items():
+        bugs_in[sprint_id] = [
+            {"key": key} for key, days in sorted(triaged.items())
+            if any(window_start <= day <= window_end for day in days)
+        ]
+    return bugs_in
+
+def get_bugs_in(domain, sprint_end_iso, team_id, auth_header):
+    """
+    Fetches bugs transitioned to 'Triaged' within one sprint's window (see bugs_in_window).
+    Returns None if the search failed.
+    """
+    bugs_in = get_bugs_in_for_sprints(domain, [{"id": None, "completeDate": sprint_end_iso}], team_id, auth_header)
+    return bugs_in[None] if bugs_in is not None else None
+
+def get_board_done_statuses(domain, board_id, auth_header):
+    cache_key = f"{domain}:board:{board_id}:done_statuses"
+    cached, fresh = cache_lookup(DB_FILE, cache_key)
+    if fresh:
+        return set(cached)
+
+    client = get_client(domain, auth_header, max_workers=MAX_WORKERS)
+    url = f"/rest/agile/1.0/board/{board_id}/configuration"
+    try:
+        r = client.get(url)
+        r.raise_for_status()
+        data = r.json()
+        
+        # Get the columns
+        columns = data.get('columnConfig', {}).get('columns', [])
+        if not columns:
+            return []
+            
+        # Assuming the Right-Most column is "Done"
+        done_column = columns[-1]
+        statuses = [s['id'] for s in done_column.get('statuses', [])]
+        
+        # We need status NAMES or IDs? 
+        # The issue fields return status object with name and id.
+        # Let's verify what the config returns. It usually returns 'id' (status id).
+        # But our main loop might rely on names or we need to map ids.
+        # Let's return a set of Status IDs for robustness.
+        cache_put(DB_FILE, cache_key, statuses, BOARD_CONFIG_TTL)
+        return set(statuses)
+    except Exception as e:
+        print(f"Error fetching board config: {e}")
+        # A stale column mapping beats treating every issue as incomplete
+        return set(cached) if cached is not None else set()
+
+def get_jira_fields(domain, auth_header):
+    cache_key = f"{domain}:fields"
+    cached, fresh = cache_lookup(DB_FILE, cache_key)
+    if fresh:
+        return cached
+
+    client = get_client(domain, auth_header, max_workers=MAX_WORKERS)
+    url = "/rest/api/3/field"
+    try:
+        r = client.get(url)
+        r.raise_for_status()
+        fields = r.json()
+        cache_put(DB_FILE, cache_key, fields, FIELDS_TTL)
+        return fields
+    except Exception as e:
+        if cached is not None:
+            return cached
+        return [{"error": str(e)}]
+
+def calculate_stats(sprint_info, issues, bugs_in_issues, planned_capacity, final_capacity, sp_field_id, done_status_ids, collect_breakdown=True):
+    """
+    Flattens the sprint's issues into columns once, then computes metrics with vectorized masks.
+    The per-issue breakdown is only built when collect_breakdown is set (the detail view);
+    trend loading skips it and gets identical metrics.
+    """
+    # Flattening replays every issue's changelog, so it is timed apart from the vectorized maths
+    with timed("stats.flatten", sprint_id=sprint_info.get('id'), issues=len(issues)):
+        columns = flatten_sprint(sprint_info, issues)
+    if columns is None:
+        return {}, []
+    breakdown = [] if collect_breakdown else None
+    with timed("stats.compute", sprint_id=sprint_info.get('id')):
+        metrics = compute_stats(columns, len(bugs_in_issues), final_capacity, done_status_ids, breakdown=breakdown)
+    return metrics, breakdown or []
+
+def calculate_sprint_metrics(domain, board_id, sprint, auth, sp_field_id, team_id, done_status_ids, final_capacity, planned_capacity=0.0, force=False):
+    """
+    Metrics and issue breakdown for one sprint listing entry.
+    A closed sprint frozen at its current completeDate is served from the snapshot without calling Jira
+    (only the capacity-based completion % is redone). Otherwise, or with force, the sprint is synced
+    and recomputed, and frozen again if closed.
+    Returns (metrics, breakdown, source) with source "snapshot", "computed" or "unchanged"
+    (forced recompute, but the Jira data hashes the same as when it was frozen).
+    Raises RuntimeError if Bugs In could not be fetched; nothing is frozen then, so the next run retries.
+    """
+    snapshot = get_snapshot(DB_FILE, board_id, team_id, sprint['id'])
+    if snapshot and not force and snapshot['breakdown'] is not None and is_current(snapshot['complete_date'], sprint):
+        metrics = dict(snapshot['metrics'])
+        metrics['completion_pct_total'] = completion_pct(metrics['velocity'], final_capacity)
+        return metrics, snapshot['breakdown'], "snapshot"
+
+    # A forced recompute re-pulls the sprint in full, in case old issues were edited without moving `updated`
+    sprint_info, issues = sync_sprint_issues(domain, sprint['id'], auth, sp_field_id, full=force)
+    with timed("sprint.bugs_in", sprint_id=sprint['id']):
+        bugs_in_list = get_bugs_in(domain, sprint_info.get('completeDate'), team_id, auth)
+    if bugs_in_list is None:
+        raise RuntimeError("Bugs In search failed; the sprint was not saved, try again")
+    metrics, breakdown = calculate_stats(sprint_info, issues, bugs_in_list, planned_capacity, final_capacity, sp_field_id, done_status_ids)
+
+    with timed("sprint.freeze", sprint_id=sprint['id']):
+        digest = source_hash(sprint_info, issues, bugs_in_list)
+        freeze_sprint(DB_FILE, board_id, team_id, sprint['id'], sprint_info, digest, metrics, breakdown)
+    source = "unchanged" if force and snapshot and snapshot['source_hash'] == digest else "computed"
+    return metrics, breakdown, source
+
+def stale_sprint_ids(board_id, team_id, sprints, existing_ids):
+    """
+    Ids of the sprints whose stored metrics are missing or can't be trusted: a closed sprint's row only
+    counts once it is frozen at the sprint's current completeDate (it may have been computed while active).
+    """
+    frozen = get_frozen_dates(DB_FILE, board_id, team_id, [s['id'] for s in sprints])
+    return [
+        s['id'] for s in sprints
+        if s['id'] not in existing_ids or (s.get('state') == 'closed' and not is_current(frozen.get(s['id']), s))
+    ]
+
+def load_sprints_metrics(sprints, domain, auth, sp_field_id, board_id, team_id, done_status_ids, concurrency=MAX_WORKERS,
+                         progress_callback=None, bugs_in=None):
+    """
+    Fetches and calculates metrics for many sprints at once through the asyncio fan-out,
+    then saves them all in one batch. The sprints' issue syncs run alongside one batched
+    Bugs In search covering all of them (the board's sprint listing already carries completeDate),
+    unless bugs_in ({sprint_id: bugs}, from get_bugs_in_for_sprints) is passed in.
+    Returns {sprint_id: metrics dict or None on error}.
+    """
+    def fetch_bugs_in():
+        with timed("sprint.bugs_in", sprints=len(sprints)):
+            return get_bugs_in_for_sprints(domain, sprints, team_id, auth)
+
+    def fetch_issues(sprint):
+        return sync_sprint_issues(domain, sprint['id'], auth, sp_field_id)
+
+    def finish(sprint, synced):
+        sprint_info, issues = synced
+        if not sprint_info:
+            return None
+        found = bugs_in_future.result() if bugs_in is None else bugs_in
+        if found is None:
+            # Not saved or frozen, so the sprint is retried next time
+            raise RuntimeError("Bugs In search failed")
+        bugs_in_list = found.get(sprint['id'], [])
+        # Saved capacities if the sprint has them, else defaults (can be refined later)
+        planned_capacity, final_capacity = get_capacity(board_id, team_id, sprint['id'])
+        metrics, _ = calculate_stats(sprint_info, issues, bugs_in_list, planned_capacity or 80, final_capacity or 80,
+                                     sp_field_id, done_status_ids, collect_breakdown=False)
+        # Frozen without a breakdown; the detail view recomputes once to fill it in
+        with timed("sprint.freeze", sprint_id=sprint['id']):
+            freeze_sprint(DB_FILE, board_id, team_id, sprint['id'], sprint_info, source_hash(sprint_info, issues, bugs_in_list), metrics, None)
+        return metrics or None
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        bugs_in_future = executor.submit(fetch_bugs_in) if bugs_in is None and sprints else None
+        results = fetch_sprints_concurrently(sprints, [fetch_issues], finish,
+                                             concurrency=concurrency, progress_callback=progress_callback)
+    # One transaction for the whole batch instead of a write per worker
+    with timed("metrics.save", sprints=len(sprints)):
+        save_metrics_many(board_id, team_id, [(s['id'], s.get('name', ''), results[s['id']]) for s in sprints if results.get(s['id'])])
+    return results
+
+def trend_sprint_ids(selected_sprint_id, sprints_list, window=TREND_WINDOW):
+    """
+    Ids of the selected sprint and the window - 1 sprints before it (sprints_list is newest first),
+    or [] when the selected sprint is not in the list.
+    """
+    sprint_ids = [s['id'] for s in sprints_list]
+    try:
+        selected_idx = sprint_ids.index(selected_sprint_id)
+    except ValueError:
+        return []
+    return sprint_ids[selected_idx:selected_idx + max(1, min(window, MAX_TREND_WINDOW))]
+
+def load_trend_data(selected_sprint_id, sprints_list, domain, auth, sp_field_id, team_id, board_id, progress_callback=None,
+                    concurrency=MAX_WORKERS, window=TREND_WINDOW):
+    """
+    Load metrics for the selected sprint and the window - 1 sprints before it.
+    Uses cache-first strategy and concurrent API calls.
+    Returns DataFrame with the metrics and rolling stats of those sprints (get_trend_metrics), oldest first.
+    """
+    # Pre-fetch done statuses once (Streamlit safe here)
+    with timed("trend.done_statuses"):
+        done_status_ids = get_board_done_statuses(domain, board_id, auth)
+    
+    sprint_map = {s['id']: s for s in sprints_list}
+    target_ids = trend_sprint_ids(selected_sprint_id, sprints_list, window)
+    if not target_ids:
+        return get_trend_metrics(DB_FILE, board_id, team_id, [selected_sprint_id])
+    
+    with timed("trend.cached", sprints=len(target_ids)):
+        df_existing = get_metrics_for(DB_FILE, board_id, team_id, target_ids)
+        existing_ids = set(df_existing['sprint_id'].tolist())
+    
+        # Identify which sprints need fetching (missing, or closed but not frozen at their completeDate)
+        to_fetch = [(sid, sprint_map[sid]) for sid in stale_sprint_ids(board_id, team_id, [sprint_map[sid] for sid in target_ids], existing_ids)]
+    
+    if progress_callback:
+        progress_callback(f"Loading {len(target_ids)} sprints ({len(to_fetch)} need fetching)...")
+    
+    # Concurrent fetch for missing sprints
+    if to_fetch:
+        with timed("trend.fetch", sprints=len(to_fetch)):
+            load_sprints_metrics([sprint for _, sprint in to_fetch], domain, auth, sp_field_id, board_id, team_id, done_status_ids,
+                                 concurrency=concurrency, progress_callback=progress_callback)
+    
+    # Return updated metrics (saving refreshed the rollups)
+    with timed("trend.reload"):
+        return get_trend_metrics(DB_FILE, board_id, team_id, target_ids)
+
+def parse_boards(text, default_team_id=""):
+    """
+    Parses a board list, one "BOARD_ID[:TEAM_ID]" per line (or comma separated).
+    Returns {board_id: [team_id, ...]} in the order given.
+    """
+    boards = {}
+    for entry in text.replace(',', '\n').splitlines():
+        entry = entry.strip()
+        if not entry:
+            continue
+        board_id, _, team_id = entry.partition(':')
+        teams = boards.setdefault(board_id.strip(), [])
+        team_id = team_id.strip() or default_team_id
+        if team_id not in teams:
+            teams.append(team_id)
+    return boards
+
+def backfill_board(domain, auth, board_id, team_ids, sp_field_id, limit=1000, concurrency=MAX_WORKERS, batch_size=25,
+                   force=False, progress_callback=None):
+    """
+    Computes metrics for the closed sprints of one board, for each of its teams in turn.
+    The sprint listing and board configuration are fetched once and shared by all teams
+    (later teams find the sprints' issues already synced). Unless force is set, sprints with
+    current metrics are skipped, and results are saved every batch_size sprints.
+    Returns {team_id: (closed sprint count, sprints attempted, failed sprints)}.
+    """
+    sprints = [s for s in get_sprints(domain, board_id, auth, limit=limit) if s.get('state') == 'closed']
+    done_status_ids = get_board_done_statuses(domain, board_id, auth)
+    size = max(1, batch_size)
+
+    summary = {}
+    for team_id in team_ids:
+        if force:
+            todo = sprints
+        else:
+            existing_ids = set(get_metrics_for(DB_FILE, board_id, team_id, [s['id'] for s in sprints])['sprint_id'].tolist())
+            stale = set(stale_sprint_ids(board_id, team_id, sprints, existing_ids))
+            todo = [s for s in sprints if s['id'] in stale]
+        if progress_callback:
+            progress_callback(f"Board {board_id} / team {team_id}: {len(sprints)} closed sprints, {len(todo)} to backfill")
+        # One Bugs In search for everything this team is about to backfill (each batch searches again if it failed)
+        bugs_in = get_bugs_in_for_sprints(domain, todo, team_id, auth)
+
+        failed = []
+        batches = [todo[i:i + size] for i in range(0, len(todo), size)]
+        for number, batch in enumerate(batches, 1):
+            report = None
+            if progress_callback:
+                def report(message, number=number):
+                    progress_callback(f"Board {board_id} / team {team_id} [batch {number}/{len(batches)}] {message}")
+            results = load_sprints_metrics(batch, domain, auth, sp_field_id, board_id, team_id, done_status_ids,
+                                           concurrency=concurrency, progress_callback=report, bugs_in=bugs_in)
+            failed.extend(s for s in batch if not results.get(s['id']))
+        summary[team_id] = (len(sprints), len(todo), failed)
+    return summary
+
+def backfill_boards(domain, auth, boards, sp_field_id, limit=1000, concurrency=MAX_WORKERS, batch_size=25,
+                    force=False, progress_callback=None):
+    """
+    Runs backfill_board for every {board_id: [team_id, ...]} entry concurrently, one thread per board.
+    All boards share the process-wide HTTP client, whose pool (sized by its creator) bounds the
+    requests in flight across boards, and the metadata cache. progress_callback may be called
+    from the board threads.
+    Returns {(board_id, team_id): (closed sprint count, sprints attempted, failed sprints)};
+    a board that fails outright is reported with count None.
+    """
+    summary = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(boards))) as executor:
+        futures = {
+            executor.submit(backfill_board, domain, auth, board_id, team_ids, sp_field_id, limit=limit,
+                            concurrency=concurrency, batch_size=batch_size, force=force,
+                            progress_callback=progress_callback): (board_id, team_ids)
+            for board_id, team_ids in boards.items()
+        }
+        for future in as_completed(futures):
+            board_id, team_ids = futures[future]
+            try:
+                for team_id, result in future.result().items():
+                    summary[(board_id, team_id)] = result
+            except Exception as e:
+                print(f"Error backfilling board {board_id}: {e}")
+                for team_id in team_ids:
+                    summary[(board_id, team_id)] = (None, 0, [])
+    return summary
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+# The app's modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jira_standin
+import sprint_stats
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """
+    Points sprint_stats at a freshly migrated database in tmp_path and returns its path.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sprint_stats, "DB_FILE", str(tmp_path / "sprint_stats.db"))
+    sprint_stats.init_db()
+    return sprint_stats.DB_FILE
+
+
+@pytest.fixture
+def serve(db):
+    """
+    serve(backend) starts the Jira stand-in over a SyntheticJira and returns its URL; stopped after the test.
+    """
+    servers = []
+
+    def start(backend):
+        server, url = jira_standin.start_standin(backend)
+        servers.append(server)
+        return url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture
+def auth():
+    return sprint_stats.get_auth_header("user@example.com", "token")
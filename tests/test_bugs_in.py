@@ -0,0 +1,101 @@
+from datetime import datetime, timezone
+
+import pytest
+import requests
+
+import jira_standin
+import sprint_stats
+from jira_fixtures import DONE_STATUS_IDS, SP_FIELD_ID
+from snapshots import get_snapshot
+
+BOARD_ID = "1"
+TEAM_ID = "team"
+
+
+class FlakySearchJira(jira_standin.SyntheticJira):
+    """
+    Synthetic site whose Bugs In search answers 500 until search_fails is cleared.
+    """
+
+    search_fails = True
+
+    def search(self, query, body):
+        if self.search_fails:
+            return 500, {"errorMessages": ["Internal server error"]}
+        return super().search(query, body)
+
+
+@pytest.fixture
+def site(serve):
+    backend = FlakySearchJira(sprint_count=3, issues_per_sprint=20)
+    return backend, serve(backend)
+
+
+@pytest.fixture
+def pacific_site(serve):
+    backend = jira_standin.SyntheticJira(sprint_count=4, issues_per_sprint=5, time_zone="America/Los_Angeles")
+    return backend, serve(backend)
+
+
+def test_failed_bugs_in_search_is_not_frozen(site, auth):
+    backend, url = site
+    sprint = backend.sprints[0]
+
+    with pytest.raises(RuntimeError):
+        sprint_stats.calculate_sprint_metrics(url, BOARD_ID, sprint, auth, SP_FIELD_ID, TEAM_ID, DONE_STATUS_IDS, 80.0)
+    assert get_snapshot(sprint_stats.DB_FILE, BOARD_ID, TEAM_ID, sprint['id']) is None
+
+    backend.search_fails = False
+    metrics, _, source = sprint_stats.calculate_sprint_metrics(url, BOARD_ID, sprint, auth, SP_FIELD_ID, TEAM_ID,
+                                                               DONE_STATUS_IDS, 80.0)
+    assert source == "computed"
+    assert get_snapshot(sprint_stats.DB_FILE, BOARD_ID, TEAM_ID, sprint['id'])['metrics']['bugs_in'] == metrics['bugs_in']
+
+
+def test_batched_bugs_in_buckets_days_in_the_user_timezone(pacific_site, auth):
+    backend, url = pacific_site
+    closed = [s for s in backend.sprints if s['state'] == 'closed']
+    # First sprint closes 2024-01-16 09:00 UTC: its window is 2024-01-03 to 2024-01-15 in the user's timezone
+    assert sprint_stats.bugs_in_window(closed[0]['completeDate']) == ("2024-01-03", "2024-01-15")
+    # Jan 15 19:00 in Los Angeles (already Jan 16 in UTC): inside the window
+    backend.add_triaged_bug("EDGE-1", datetime(2024, 1, 16, 3, 0, tzinfo=timezone.utc))
+    # Jan 2 21:00 in Los Angeles (already Jan 3 in UTC): before the window
+    backend.add_triaged_bug("EDGE-2", datetime(2024, 1, 3, 5, 0, tzinfo=timezone.utc))
+
+    batched = sprint_stats.get_bugs_in_for_sprints(url, closed, TEAM_ID, auth)
+
+    first = {bug['key'] for bug in batched[closed[0]['id']]}
+    assert "EDGE-1" in first and "EDGE-2" not in first
+    for sprint in closed:
+        # What a per-sprint CHANGED TO ... DURING query returns for the same window
+        window_start, window_end = sprint_stats.bugs_in_window(sprint['completeDate'])
+        jql = f'status CHANGED TO "Triaged" DURING ("{window_start}", "{window_end}")'
+        found = requests.get(f"{url}/rest/api/3/search/jql", params={"jql": jql, "maxResults": 1000}).json()['issues']
+        assert {bug['key'] for bug in batched[sprint['id']]} == {bug['key'] for bug in found}
+
+
+@pytest.fixture
+def long_history_bugs(serve, monkeypatch):
+    # Twelve bugs whose Triaged transition is past the inline changelog, with a small bulk fetch cap
+    monkeypatch.setattr(jira_standin, "BULK_CHANGELOG_ISSUE_LIMIT", 5)
+    backend = jira_standin.SyntheticJira(sprint_count=3, issues_per_sprint=5, bugs_per_sprint=0)
+    for n in range(12):
+        backend.add_triaged_bug(f"LONG-{n + 1}", datetime(2024, 1, 10, 12, n, tzinfo=timezone.utc),
+                                earlier_histories=jira_standin.INLINE_CHANGELOG_LIMIT)
+    return backend, serve(backend)
+
+
+def test_truncated_bug_changelogs_are_completed_in_batches(long_history_bugs, auth, monkeypatch):
+    backend, url = long_history_bugs
+    monkeypatch.setattr(sprint_stats, "CHANGELOG_BATCH_SIZE", 5)
+    sprint = backend.sprints[0]
+
+    batched = sprint_stats.get_bugs_in_for_sprints(url, [sprint], TEAM_ID, auth)
+
+    assert {bug['key'] for bug in batched[sprint['id']]} == {f"LONG-{n + 1}" for n in range(12)}
+
+
+def test_failed_changelog_completion_fails_bugs_in(long_history_bugs, auth):
+    backend, url = long_history_bugs
+    # One request for all twelve bugs is over the cap and rejected
+    assert sprint_stats.get_bugs_in_for_sprints(url, [backend.sprints[0]], TEAM_ID, auth) is None
@@ -0,0 +1,63 @@
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+import jira_standin
+import sprint_stats
+from jira_fixtures import SP_FIELD_ID, jira_timestamp
+
+
+@pytest.fixture
+def site(serve):
+    backend = jira_standin.SyntheticJira(sprint_count=3, issues_per_sprint=10)
+    return backend, serve(backend)
+
+
+def test_issue_removed_before_close_is_dropped(site, auth, monkeypatch):
+    backend, url = site
+    sprint = next(s for s in backend.sprints if s['state'] == 'active')
+    _, issues = sprint_stats.sync_sprint_issues(url, sprint['id'], auth, SP_FIELD_ID)
+    assert len(issues) == 10
+
+    # Taken out of the sprint while it was active, then the sprint is closed
+    removed = backend.sprint_issues[sprint['id']].pop(0)
+    sprint['state'] = 'closed'
+    sprint['completeDate'] = sprint['endDate']
+
+    sprint_info, issues = sprint_stats.sync_sprint_issues(url, sprint['id'], auth, SP_FIELD_ID)
+    assert sprint_info['state'] == 'closed'
+    assert len(issues) == 9 and removed['key'] not in {i.key for i in issues}
+
+    # Once stored as closed, membership is not listed again
+    monkeypatch.setattr(sprint_stats, "get_sprint_issue_keys", lambda *args: pytest.fail("membership relisted"))
+    _, issues = sprint_stats.sync_sprint_issues(url, sprint['id'], auth, SP_FIELD_ID)
+    assert len(issues) == 9
+
+
+@pytest.fixture
+def host_timezone(monkeypatch):
+    # Run under a host timezone far from the stand-in's, restored afterwards
+    monkeypatch.setenv("TZ", "Asia/Tokyo")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_updated_since_is_read_in_the_user_timezone(host_timezone):
+    backend = jira_standin.SyntheticJira(sprint_count=2, issues_per_sprint=40, time_zone="America/Los_Angeles")
+    sprint = backend.sprints[0]
+    updated = sorted(i['fields']['updated'] for i in backend.sprint_issues[sprint['id']])
+    # A minute after the middle issue's update, on the user's clock: that issue is just left out
+    middle = datetime.strptime(updated[len(updated) // 2], "%Y-%m-%dT%H:%M:%S.%f%z")
+    since = (middle + timedelta(minutes=1)).astimezone(ZoneInfo(backend.time_zone))
+
+    status, page = backend.sprint_issue_page(
+        {'jql': f'updated >= "{since:%Y-%m-%d %H:%M}"', 'maxResults': 1000}, None, str(sprint['id']))
+
+    cutoff = jira_timestamp(since.replace(second=0, microsecond=0))
+    assert status == 200
+    assert sorted(i['fields']['updated'] for i in page['issues']) == [u for u in updated if u >= cutoff]
+    assert jira_timestamp(middle) not in {i['fields']['updated'] for i in page['issues']}
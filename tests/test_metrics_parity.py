@@ -0,0 +1,60 @@
+"""
+Parity of the single metrics engine: trend loading (load_sprints_metrics, no breakdown) and the
+detail view (calculate_sprint_metrics) must produce the same numbers for the same sprints, and
+match what the original calculate_stats computed for them.
+
+data/metrics_parity.json was recorded by running the original app.py's calculate_stats and get_bugs_in
+(the baseline commit, ca93ea6) over the SITE sprints, served by the stand-in with complete changelogs.
+"""
+import json
+import os
+
+import pytest
+
+import jira_standin
+import sprint_stats
+from jira_fixtures import SP_FIELD_ID
+
+SITE = dict(sprint_count=6, issues_per_sprint=60, bugs_per_sprint=6, page_size=25, seed=7)
+PLANNED_CAPACITY = 70.0
+FINAL_CAPACITY = 65.0
+BOARD_ID = "1"
+TEAM_ID = "team"
+
+EXPECTED_FILE = os.path.join(os.path.dirname(__file__), "data", "metrics_parity.json")
+
+
+def by_key(row):
+    return row['Key']
+
+
+@pytest.fixture
+def site(serve):
+    backend = jira_standin.SyntheticJira(**SITE)
+    return backend, serve(backend)
+
+
+def test_trend_and_detail_paths_match_recorded_engine(site, auth):
+    backend, url = site
+    with open(EXPECTED_FILE) as f:
+        expected = json.load(f)
+    closed = [s for s in backend.sprints if s['state'] == 'closed']
+    assert sorted(expected) == sorted(str(s['id']) for s in closed)
+
+    for sprint in closed:
+        sprint_stats.save_capacity(BOARD_ID, TEAM_ID, sprint['id'], sprint['name'], PLANNED_CAPACITY, FINAL_CAPACITY)
+    done_status_ids = sprint_stats.get_board_done_statuses(url, BOARD_ID, auth)
+
+    trend = sprint_stats.load_sprints_metrics(closed, url, auth, SP_FIELD_ID, BOARD_ID, TEAM_ID, done_status_ids)
+
+    for sprint in closed:
+        recorded = expected[str(sprint['id'])]
+        metrics, breakdown, source = sprint_stats.calculate_sprint_metrics(
+            url, BOARD_ID, sprint, auth, SP_FIELD_ID, TEAM_ID, done_status_ids, FINAL_CAPACITY, PLANNED_CAPACITY, force=True)
+
+        assert source in ("computed", "unchanged")
+        for name, value in recorded['metrics'].items():
+            assert trend[sprint['id']][name] == pytest.approx(value), (sprint['id'], name, "trend")
+            assert metrics[name] == pytest.approx(value), (sprint['id'], name, "detail")
+        # The issue store hands issues back in its own order; rows are compared per issue
+        assert sorted(breakdown, key=by_key) == sorted(recorded['breakdown'], key=by_key)
@@ -0,0 +1,50 @@
+import pytest
+
+from sheets_export import enqueue_exports, flush_exports, pending_exports
+from webhook_standin import SheetReceiver, start_receiver
+
+BOARD_ID = "1"
+TEAM_ID = "team"
+
+
+def metrics_row(sprint_id, velocity):
+    return {
+        "sprint_id": sprint_id, "sprint_name": f"Team Iteration {sprint_id} 2025", "velocity": velocity,
+        "completed_planned": velocity, "completed_unplanned": 0.0, "carryover_pct": 10.0, "planned_pct": 90.0,
+        "completion_pct_total": 95.0, "bugs_in": 2, "bugs_out": 1,
+    }
+
+
+@pytest.fixture
+def receiver():
+    server, receiver, url = start_receiver(SheetReceiver())
+    yield receiver, url
+    server.shutdown()
+
+
+def test_reexporting_earlier_numbers_is_written(db, receiver):
+    sheet, url = receiver
+    for velocity in (30.0, 35.0, 30.0):
+        assert enqueue_exports(db, BOARD_ID, TEAM_ID, [metrics_row(7, velocity)]) == (1, 0)
+        assert flush_exports(db, url, max_attempts=1)['sent'] == 1
+    assert sheet.rows["IR07"]["velocity"] == 30.0
+
+
+def test_waiting_export_is_skipped_or_superseded(db):
+    assert enqueue_exports(db, BOARD_ID, TEAM_ID, [metrics_row(7, 30.0)]) == (1, 0)
+    assert enqueue_exports(db, BOARD_ID, TEAM_ID, [metrics_row(7, 30.0)]) == (0, 1)
+    assert enqueue_exports(db, BOARD_ID, TEAM_ID, [metrics_row(7, 35.0)]) == (1, 0)
+    assert [payload['velocity'] for _, payload in pending_exports(db)] == [35.0]
+
+
+def test_retry_reuses_the_idempotency_key(db):
+    server, sheet, url = start_receiver(SheetReceiver(fail_first=1))
+    try:
+        enqueue_exports(db, BOARD_ID, TEAM_ID, [metrics_row(7, 30.0)])
+        [(key, _)] = pending_exports(db)
+        assert flush_exports(db, url, max_attempts=1)['failed']
+        assert pending_exports(db)[0][0] == key
+        assert flush_exports(db, url, max_attempts=1)['sent'] == 1
+        assert sheet.requests[-1][1]['batch'][0]['idempotencyKey'] == key
+    finally:
+        server.shutdown()
@@ -0,0 +1,143 @@
+"""
+Local stand-in for the Google Apps Script export webhook (google_apps_script.js), for testing exports offline.
+
+    python webhook_standin.py --port 8090 --fail-first 2
+
+Then set the app's Webhook URL to http://127.0.0.1:8090/exec. It answers batch POSTs and legacy
+?data= GETs the way the script does (per-sprint results, duplicate idempotency keys skipped) and
+keeps the "sheet" in memory; --fail-first answers the first N requests with 503 to exercise retries.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def sprint_key(sprint_name):
+    """
+    Mirrors getSprintKey(): "Team Iteration 7 2025" -> "IR07", "ir23" -> "IR23", else None.
+    """
+    match = re.search(r"Iteration\s+(\d+)", sprint_name or "", re.IGNORECASE)
+    if match:
+        return f"IR{int(match.group(1)):02d}"
+    if re.fullmatch(r"IR\d+", sprint_name or "", re.IGNORECASE):
+        return sprint_name.upper()
+    return None
+
+
+class SheetReceiver:
+    """
+    What the script would do to the "Team Stats" sheet: rows maps sprint key -> latest payload,
+    latest is the payload behind the static "latest data" cells. Requests are serialized like
+    the script's LockService lock.
+    """
+
+    def __init__(self, known_keys=None, fail_first=0):
+        self.known_keys = set(known_keys) if known_keys else None
+        self.fail_first = fail_first
+        self.lock = threading.Lock()
+        self.rows = {}
+        self.latest = None
+        self.seen = set()
+        self.requests = []
+
+    def handle_batch(self, items):
+        results = []
+        for item in items:
+            key = item.get('idempotencyKey')
+            if key and key in self.seen:
+                results.append({"idempotencyKey": key, "status": "duplicate"})
+                continue
+            sprint = sprint_key(item.get('sprintName'))
+            if not sprint or (self.known_keys is not None and sprint not in self.known_keys):
+                results.append({"idempotencyKey": key, "status": "error",
+                                "message": f"Could not place sprint in the sheet: {item.get('sprintName')}"})
+                continue
+            self.rows[sprint] = item
+            self.latest = item
+            if key:
+                self.seen.add(key)
+            results.append({"idempotencyKey": key, "status": "updated", "sprintKey": sprint})
+        updated = sum(1 for r in results if r['status'] == "updated")
+        return 200, {"status": "success", "updated": f"Updated stats for {updated} sprints", "results": results}
+
+    def handle(self, method, query, body):
+        with self.lock:
+            self.requests.append((method, body if body is not None else query))
+            if len(self.requests) <= self.fail_first:
+                return 503, {"status": "error", "updated": "Service unavailable"}
+            if method == "POST":
+                if not isinstance(body, dict) or not isinstance(body.get('batch'), list):
+                    return 200, {"status": "error", "updated": "Expected {\"batch\": [...]}"}
+                return self.handle_batch(body['batch'])
+            if 'data' not in query:
+                return 200, {"status": "error", "updated": "No data parameter found."}
+            return self.handle_batch([json.loads(query['data'])])
+
+
+def make_handler(receiver):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self, method):
+            parsed = urllib.parse.urlparse(self.path)
+            query = dict(urllib.parse.parse_qsl(parsed.query))
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                body = json.loads(self.rfile.read(length)) if length else None
+            except ValueError:
+                body = None
+            status, payload = receiver.handle(method, query, body)
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._respond("GET")
+
+        def do_POST(self):
+            self._respond("POST")
+
+        def log_message(self, format, *args):
+            pass
+
+    return WebhookHandler
+
+
+def start_receiver(receiver=None, host="127.0.0.1", port=0):
+    """
+    Serves a SheetReceiver on a background thread.
+    Returns (server, receiver, webhook_url); call server.shutdown() to stop it.
+    """
+    receiver = receiver or SheetReceiver()
+    server = ThreadingHTTPServer((host, port), make_handler(receiver))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, receiver, f"http://{host}:{server.server_port}/exec"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Google Sheets export webhook.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N requests with 503")
+    args = parser.parse_args(argv)
+
+    server, receiver, url = start_receiver(SheetReceiver(fail_first=args.fail_first), host=args.host, port=args.port)
+    print(f"Webhook stand-in at {url}; Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"{len(receiver.requests)} requests, {len(receiver.rows)} sprints in the sheet: {', '.join(sorted(receiver.rows))}")
+
+
+if __name__ == "__main__":
+    main()